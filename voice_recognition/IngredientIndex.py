@@ -0,0 +1,243 @@
+import bisect
+import heapq
+import math
+from array import array
+from collections import OrderedDict
+
+from IngredientMatcher import IngredientMatcher
+
+
+class IngredientIndex:
+    """Odwrócony indeks składników: składnik -> numery przepisów, wyszukiwanie przez iloczyn zbiorów bitowych"""
+    GRAM_SIZE = 3
+    CACHE_SIZE = 256
+    SCORE_SCALE = 1 << 16  # Rozdzielczość rankingu: wagi składników to liczby całkowite o sumie ~SCORE_SCALE
+
+    def __init__(self, ingredient_lists=()):
+        # Znormalizowany składnik -> numery przepisów, które go zawierają: częste jako bity w int,
+        # rzadkie jako tablica numerów, bo int zajmuje tyle bajtów, ile wynosi jego najwyższy bit / 8
+        self.postings = {}
+        self.terms = []  # słownik składników, pozycja = numer w indeksie n-gramów
+        self.term_ids = {}
+        self.grams = {}  # n-gram (długości 1..GRAM_SIZE) -> numery składników ze słownika
+        self.matcher = IngredientMatcher()  # odmiany i literówki: rdzenie słów i odległość edycyjna
+        # Ostatnie wyniki (LRU): składnik zapytania -> bity oraz frozenset składników zapytania -> bity
+        self.lookups = OrderedDict()
+        self.results = OrderedDict()
+        self.size = 0
+        numbers = {}
+        for ingredients in ingredient_lists:
+            for ingredient in self._terms(ingredients):
+                numbers.setdefault(ingredient, array('I')).append(self.size)
+            self.size += 1
+        for ingredient, ingredient_numbers in numbers.items():
+            self._add_term(ingredient)
+            self.postings[ingredient] = self._compact(ingredient_numbers)
+
+    @staticmethod
+    def normalize(ingredient):
+        """Postać składnika używana przy porównaniach"""
+        return ingredient.lower()
+
+    def _terms(self, ingredients):
+        return {self.normalize(ing) for ing in ingredients}
+
+    def _compact(self, numbers):
+        if len(numbers) * 32 < self.size:
+            return numbers
+        return self._to_bits(numbers)
+
+    @staticmethod
+    def _to_bits(numbers):
+        data = bytearray(numbers[-1] // 8 + 1 if numbers else 0)
+        for number in numbers:
+            data[number >> 3] |= 1 << (number & 7)
+        return int.from_bytes(data, "little")
+
+    def add(self, ingredients):
+        """Dodanie przepisu o podanych składnikach jako kolejnego numeru w indeksie"""
+        number = self.size
+        self.size += 1
+        self.clear_cache()
+        for ingredient in self._terms(ingredients):
+            self._insert(ingredient, number)
+
+    def update(self, number, old_ingredients, new_ingredients):
+        """Zmiana składników przepisu o danym numerze bez przebudowy indeksu"""
+        self.clear_cache()
+        old_terms, new_terms = self._terms(old_ingredients), self._terms(new_ingredients)
+        for ingredient in old_terms - new_terms:
+            posting = self.postings[ingredient]
+            if isinstance(posting, int):
+                self.postings[ingredient] = posting & ~(1 << number)
+            else:
+                del posting[bisect.bisect_left(posting, number)]
+        for ingredient in new_terms - old_terms:
+            self._insert(ingredient, number)
+
+    def _insert(self, ingredient, number):
+        if ingredient not in self.postings:
+            self._add_term(ingredient)
+            self.postings[ingredient] = array('I')
+        posting = self.postings[ingredient]
+        if isinstance(posting, int):
+            self.postings[ingredient] = posting | 1 << number
+        else:
+            # Tablica numerów musi pozostać posortowana
+            bisect.insort(posting, number)
+            self.postings[ingredient] = self._compact(posting)
+
+    def bits(self, term):
+        """Bity przepisów zawierających składnik ze słownika"""
+        posting = self.postings[term]
+        return posting if isinstance(posting, int) else self._to_bits(posting)
+
+    def _add_term(self, term):
+        term_id = len(self.terms)
+        self.terms.append(term)
+        self.term_ids[term] = term_id
+        for n in range(1, self.GRAM_SIZE + 1):
+            for i in range(len(term) - n + 1):
+                self.grams.setdefault(term[i:i + n], set()).add(term_id)
+        self.matcher.add(term)
+
+    def matching_terms(self, ingredient):
+        """Składniki ze słownika, które zawierają zapytanie, są jego fragmentem albo mają jego słowa
+        w innej odmianie lub z literówką"""
+        ingredient = self.normalize(ingredient)
+        if not ingredient:
+            return list(self.terms)
+        # Składniki zawierające zapytanie: kandydaci ze wspólnych n-gramów, potwierdzeni testem "in"
+        n = min(self.GRAM_SIZE, len(ingredient))
+        postings = []
+        for i in range(len(ingredient) - n + 1):
+            term_ids = self.grams.get(ingredient[i:i + n])
+            if not term_ids:
+                postings = []
+                break
+            postings.append(term_ids)
+        matches = set()
+        if postings:
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            matches = {self.terms[term_id] for term_id in candidates if ingredient in self.terms[term_id]}
+        # Składniki będące fragmentem zapytania: wszystkie podciągi zapytania sprawdzane w słowniku
+        for i in range(len(ingredient)):
+            for j in range(i + 1, len(ingredient) + 1):
+                if ingredient[i:j] in self.postings:
+                    matches.add(ingredient[i:j])
+        if "" in self.postings:
+            matches.add("")
+        matches |= self.matcher.matches(ingredient)
+        return list(matches)
+
+    def lookup(self, ingredient):
+        """Bity przepisów, w których występuje pasujący składnik"""
+        ingredient = self.normalize(ingredient)
+        bits = self._cached(self.lookups, ingredient)
+        if bits is None:
+            bits = 0
+            for term in self.matching_terms(ingredient):
+                bits |= self.bits(term)
+            self._remember(self.lookups, ingredient, bits)
+        return bits
+
+    def search(self, ingredients):
+        """Bity przepisów zawierających WSZYSTKIE podane składniki"""
+        key = frozenset(self.normalize(ing) for ing in ingredients)
+        bits = self._cached(self.results, key)
+        if bits is not None:
+            return bits
+        # Start od największego zapamiętanego podzbioru zapytania, np. poprzedniego wyniku przed dodaniem
+        # składnika; po usunięciu składnika wynik składa się z zapamiętanych bitów pozostałych składników
+        base = max((cached for cached in self.results if cached < key), key=len, default=frozenset())
+        bits = self.results[base] if base else (1 << self.size) - 1
+        # Najpierw najrzadsze składniki, żeby szybko dojść do pustego wyniku
+        for ingredient_bits in sorted((self.lookup(ing) for ing in key - base), key=int.bit_count):
+            bits &= ingredient_bits
+            if not bits:
+                break
+        self._remember(self.results, key, bits)
+        return bits
+
+    def rank(self, ingredients, k=20):
+        """Najlepsze k przepisów według ważonego pokrycia składników zapytania: lista (numer, wynik 0..1)"""
+        terms = list(dict.fromkeys(self.normalize(ing) for ing in ingredients))
+        # Słowa spoza katalogu (np. "dzisiaj" z rozpoznanej mowy) nie obniżają pokrycia pozostałych składników
+        lookups = [bits for bits in (self.lookup(term) for term in terms) if bits]
+        # Waga TF-IDF: składnik obecny w wielu przepisach mniej wyróżnia przepis
+        weights = [math.log((self.size + 1) / (bits.bit_count() + 1)) + 1 for bits in lookups]
+        total = sum(weights)
+        if not total:
+            return []
+        # Wyniki wszystkich przepisów naraz: bit j wyniku przepisu jest jego bitem w planes[j]
+        planes = []
+        for bits, weight in zip(lookups, weights):
+            self._add_to_planes(planes, bits, round(weight / total * self.SCORE_SCALE))
+        # Wybór k najlepszych od najstarszego bitu wyniku, bez sortowania całego katalogu
+        candidates = 0
+        for bits in lookups:
+            candidates |= bits
+        chosen = 0
+        needed = k
+        for plane in reversed(planes):
+            upper = candidates & plane
+            count = upper.bit_count()
+            if count <= needed:
+                chosen |= upper
+                needed -= count
+                candidates &= ~plane
+            else:
+                candidates = upper
+            if not needed:
+                break
+        # Pozostali kandydaci mają równy wynik; pierwszeństwo mają niższe numery
+        numbers = list(self.ids(chosen))
+        for number in self.ids(candidates):
+            if len(numbers) >= k:
+                break
+            numbers.append(number)
+        scores = {number: sum(weight for bits, weight in zip(lookups, weights) if bits >> number & 1) / total
+                  for number in numbers}
+        return heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    @staticmethod
+    def _add_to_planes(planes, bits, weight):
+        # Dodaje weight do wyniku każdego przepisu z bits, jak sumator z przeniesieniem na zbiorach bitowych
+        position = 0
+        while weight:
+            if weight & 1:
+                carry, j = bits, position
+                while carry:
+                    while len(planes) <= j:
+                        planes.append(0)
+                    planes[j], carry = planes[j] ^ carry, planes[j] & carry
+                    j += 1
+            weight >>= 1
+            position += 1
+
+    @staticmethod
+    def _cached(cache, key):
+        bits = cache.get(key)
+        if bits is not None:
+            cache.move_to_end(key)
+        return bits
+
+    def _remember(self, cache, key, bits):
+        cache[key] = bits
+        if len(cache) > self.CACHE_SIZE:
+            cache.popitem(last=False)
+
+    def clear_cache(self):
+        """Zapomnienie wyników po zmianie przepisów"""
+        self.lookups.clear()
+        self.results.clear()
+
+    @staticmethod
+    def ids(bits):
+        """Numery ustawionych bitów w kolejności rosnącej"""
+        digits = bin(bits)[:1:-1]
+        position = digits.find("1")
+        while position >= 0:
+            yield position
+            position = digits.find("1", position + 1)
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from itertools import combinations
+
+
+class IngredientMatcher:
+    """Dopasowanie odmienionych i przekręconych nazw składników do słownika: tablica rdzeni słów
+    i indeks usunięć znaków (SymSpell) do wyszukiwania słów w odległości edycyjnej"""
+    MAX_DISTANCE = 2
+    CACHE_SIZE = 1024
+    # Polskie litery bez ogonków, bo rozpoznawanie mowy i klawiatura często je gubią
+    FOLDING = str.maketrans("ąćęłńóśźż", "acelnoszz")
+    # Końcówki fleksyjne, od najdłuższych, także zapisane bez ogonków; rdzeń ma co najmniej MIN_STEM znaki
+    SUFFIXES = ("owego", "owemu", "owych", "owymi", "ami", "ach", "ego", "emu", "ych", "ich", "ymi", "imi",
+                "owi", "owa", "ową", "owe", "owy", "ów", "ow", "om", "em", "ej", "ym", "im", "ia", "ie", "iu",
+                "a", "ą", "e", "ę", "i", "o", "u", "y")
+    MIN_STEM = 3
+
+    def __init__(self):
+        self.stems = {}  # słowo ze słownika -> rdzeń, liczony raz przy dodaniu składnika
+        self.terms = {}  # rdzeń słowa -> składniki ze słownika zawierające słowo o tym rdzeniu
+        self.deletes = {}  # rdzeń bez ogonków i bez 0..MAX_DISTANCE znaków -> rdzenie ze słownika
+        self.cache = OrderedDict()  # rdzeń słowa zapytania -> pasujące rdzenie ze słownika (LRU)
+
+    @classmethod
+    def stem(cls, word):
+        """Rdzeń słowa z zachowanymi ogonkami ("mąka" -> "mąk", "mak" -> "mak"): bez końcówki fleksyjnej,
+        a słowo bez końcówki traci ruchome "e" ("jajek" i "jajka" -> "jajk")"""
+        word = word.lower()
+        for suffix in cls.SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= cls.MIN_STEM:
+                return word[:-len(suffix)]
+        if word.endswith("ek") and len(word) > cls.MIN_STEM + 1:
+            word = word[:-2] + "k"
+        return word
+
+    @classmethod
+    def fold(cls, word):
+        return word.translate(cls.FOLDING)
+
+    @classmethod
+    def max_distance(cls, stem):
+        # Krótkie rdzenie tylko dokładnie: "ser" i "por" różnią się jedną literą
+        if len(stem) <= 4:
+            return 0
+        return 1 if len(stem) <= 7 else cls.MAX_DISTANCE
+
+    @staticmethod
+    def _deletes(word, distance):
+        result = {word}
+        for n in range(1, min(distance, len(word)) + 1):
+            for positions in combinations(range(len(word)), n):
+                result.add("".join(char for i, char in enumerate(word) if i not in positions))
+        return result
+
+    def add(self, term):
+        """Dodanie składnika ze słownika; każde jego słowo trafia do tablicy rdzeni"""
+        for word in term.split():
+            stem = self.stems.get(word)
+            if stem is None:
+                stem = self.stems[word] = self.stem(word)
+            if stem not in self.terms:
+                self.terms[stem] = set()
+                for deleted in self._deletes(self.fold(stem), self.MAX_DISTANCE):
+                    self.deletes.setdefault(deleted, set()).add(stem)
+                self.cache.clear()
+            self.terms[stem].add(term)
+
+    def similar_stems(self, stem):
+        """Rdzenie ze słownika w odległości edycyjnej dozwolonej dla długości krótszego z rdzeni"""
+        stems = self.cache.get(stem)
+        if stems is not None:
+            self.cache.move_to_end(stem)
+            return stems
+        folded = self.fold(stem)
+        distance = self.max_distance(folded)
+        candidates = set()
+        for deleted in self._deletes(folded, distance):
+            candidates |= self.deletes.get(deleted, set())
+        # Pierwsza litera musi się zgadzać: rozpoznawanie mowy rzadko ją myli, a "groszek" to nie "proszek".
+        # Limit zależy od krótszego z rdzeni, więc krótki rdzeń ze słownika też pasuje tylko dokładnie
+        # ("oliwk" to nie "oliw"). Różnica samych ogonków liczy się jako błąd, chyba że rdzenia zapytania
+        # nie ma w słowniku: "mak" to nie "mąk", ale "sol" znajduje "sól"
+        exact = stem in self.terms
+        stems = set()
+        for candidate in candidates:
+            limit = self.max_distance(min(stem, candidate, key=len))
+            folded_candidate = self.fold(candidate)
+            if (folded_candidate[:1] == folded[:1] and abs(len(candidate) - len(stem)) <= limit
+                    and self.distance(folded, folded_candidate) <= limit
+                    and (not exact or self.distance(stem, candidate) <= limit)):
+                stems.add(candidate)
+        self.cache[stem] = stems
+        if len(self.cache) > self.CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return stems
+
+    def matches(self, query):
+        """Składniki ze słownika, w których każde słowo zapytania ma słowo o podobnym rdzeniu"""
+        result = None
+        for word in query.split():
+            terms = set()
+            for stem in self.similar_stems(self.stem(word)):
+                terms |= self.terms[stem]
+            result = terms if result is None else result & terms
+            if not result:
+                return set()
+        return result or set()
+
+    @staticmethod
+    def distance(a, b):
+        """Odległość Damerau-Levenshteina (z zamianą sąsiednich liter)"""
+        previous, current = None, list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            before, previous, current = previous, current, [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                cost = a[i - 1] != b[j - 1]
+                current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+                if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                    current[j] = min(current[j], before[j - 2] + 1)
+        return current[len(b)]
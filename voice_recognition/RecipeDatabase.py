@@ -1,4 +1,7 @@
-import json
+import os
+
+from IngredientIndex import IngredientIndex
+from RecipeStorage import open_storage
 
 class RecipeDatabase:
     """Klasa zarządzająca bazą przepisów"""
@@ -7,13 +10,12 @@ class RecipeDatabase:
         self.load_recipes()
         
     def load_recipes(self):
-        """Ładowanie przepisów z pliku JSON"""
-        try:
-            with open(self.filename, 'r', encoding='utf-8') as f:
-                self.recipes = json.load(f)
-        except FileNotFoundError:
+        """Ładowanie przepisów z pliku JSON lub bazy SQLite (.db); z bazy wczytywane są tylko składniki"""
+        exists = os.path.exists(self.filename)
+        self.storage = open_storage(self.filename)
+        if not exists:
             # Domyślne przepisy, jeśli plik nie istnieje
-            self.recipes = [
+            self.storage.add_many([
                 {
                     "name": "Spaghetti Bolognese",
                     "ingredients": ["makaron", "mięso mielone", "pomidory", "cebula", "czosnek", "marchew", "seler"],
@@ -39,30 +41,41 @@ class RecipeDatabase:
                     "ingredients": ["kurczak", "marchew", "pietruszka", "seler", "cebula", "por", "makaron"],
                     "instructions": "Gotuj kurczaka z warzywami, dodaj przyprawy, podawaj z makaronem."
                 }
-            ]
-            self.save_recipes()
+            ])
+        self.recipes = self.storage.recipes
+        self.index = IngredientIndex(self.storage.ingredient_lists())
     
     def save_recipes(self):
-        """Zapisywanie przepisów do pliku JSON"""
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.recipes, f, ensure_ascii=False, indent=4)
+        """Zapisywanie przepisów"""
+        self.storage.save()
+
+    def add_recipe(self, recipe):
+        """Dodanie przepisu do magazynu i indeksu; zwraca jego numer"""
+        number = self.storage.add(recipe)
+        self.index.add(recipe["ingredients"])
+        return number
+
+    def update_recipe(self, number, recipe):
+        """Zmiana przepisu o danym numerze w magazynie i indeksie"""
+        old_ingredients = list(self.storage.get(number)["ingredients"])
+        self.storage.update(number, recipe)
+        self.index.update(number, old_ingredients, recipe["ingredients"])
     
     def filter_recipes(self, ingredients):
         """Filtrowanie przepisów zawierających WSZYSTKIE podane składniki"""
         if not ingredients:
             return []
-        
-        filtered = []
 
-        ingredients = [ing.lower() for ing in ingredients]
-        
-        for recipe in self.recipes:
-            recipe_ingredients = [ing.lower() for ing in recipe["ingredients"]]
+        return self.storage.get_many(list(self.index.ids(self.index.search(ingredients))))
+
+    def rank_recipes(self, ingredients, k=20):
+        """Najlepiej pasujące przepisy, także z częścią składników: lista (przepis, pokrycie 0..1)"""
+        if not ingredients:
+            return []
 
-            if all(any(ingredient in recipe_ing or recipe_ing in ingredient 
-                      for recipe_ing in recipe_ingredients) 
-                  for ingredient in ingredients):
-                filtered.append(recipe)
-                
-        return filtered
+        ranked = self.index.rank(ingredients, k)
+        return list(zip(self.storage.get_many([number for number, _ in ranked]), [score for _, score in ranked]))
 
+    def search_text(self, query, limit=50):
+        """Przepisy, których nazwa lub instrukcje zawierają słowa zapytania"""
+        return self.storage.get_many(self.storage.search_text(query, limit))
@@ -0,0 +1,263 @@
+import json
+import os
+import sqlite3
+import sys
+from array import array
+from collections import OrderedDict
+from itertools import groupby
+from operator import itemgetter
+
+
+def open_storage(filename):
+    """Wybór magazynu przepisów na podstawie rozszerzenia pliku"""
+    if os.path.splitext(filename)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        return SqliteRecipeStorage(filename)
+    return JsonRecipeStorage(filename)
+
+
+class JsonRecipeStorage:
+    """Przepisy w jednym pliku JSON, w całości w pamięci; każdy zapis przepisuje cały plik"""
+    def __init__(self, filename):
+        self.filename = filename
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                self.recipes = json.load(f)
+        except FileNotFoundError:
+            self.recipes = []
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def ingredient_lists(self):
+        """Składniki kolejnych przepisów, do budowy indeksu"""
+        return (recipe["ingredients"] for recipe in self.recipes)
+
+    def get(self, number):
+        return self.recipes[number]
+
+    def get_many(self, numbers):
+        return [self.recipes[number] for number in numbers]
+
+    def add(self, recipe):
+        self.recipes.append(recipe)
+        self.save()
+        return len(self.recipes) - 1
+
+    def add_many(self, recipes):
+        self.recipes.extend(recipes)
+        self.save()
+
+    def update(self, number, recipe):
+        self.recipes[number] = recipe
+        self.save()
+
+    def search_text(self, query, limit=50):
+        """Numery przepisów, których nazwa lub instrukcje zawierają wszystkie słowa zapytania"""
+        words = query.lower().split()
+        numbers = [number for number, recipe in enumerate(self.recipes)
+                   if all(word in f"{recipe['name']} {recipe.get('instructions', '')}".lower() for word in words)]
+        return numbers[:limit]
+
+    def save(self):
+        with open(self.filename, 'w', encoding='utf-8') as f:
+            json.dump(self.recipes, f, ensure_ascii=False, indent=4)
+
+
+class LazyRecipes:
+    """Sekwencja przepisów z bazy SQLite wczytywanych dopiero przy odczycie"""
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __len__(self):
+        return len(self.storage)
+
+    def __getitem__(self, number):
+        return self.storage.get(number)
+
+    def __iter__(self):
+        for start in range(0, len(self), SqliteRecipeStorage.BATCH_SIZE):
+            yield from self.storage.get_many(range(start, min(start + SqliteRecipeStorage.BATCH_SIZE, len(self))))
+
+
+class SqliteRecipeStorage:
+    """Przepisy w bazie SQLite: tabela składników połączona z przepisami, pełnotekstowy indeks FTS5 nazw
+    i instrukcji; przy starcie wczytywane są tylko składniki, szczegóły przepisu przy pierwszym odczycie"""
+    BATCH_SIZE = 500  # Limit parametrów zapytania "IN (...)"
+    CACHE_SIZE = 1024  # Ostatnio odczytane przepisy trzymane w pamięci (LRU)
+    INGREDIENTS_QUERY = ("SELECT ri.recipe_id, i.name FROM recipe_ingredients ri "
+                         "JOIN ingredients i ON i.id = ri.ingredient_id")
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS recipes (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            instructions TEXT
+        );
+        CREATE TABLE IF NOT EXISTS ingredients (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS recipe_ingredients (
+            recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            ingredient_id INTEGER NOT NULL REFERENCES ingredients(id),
+            PRIMARY KEY (recipe_id, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS recipe_ingredients_ingredient ON recipe_ingredients(ingredient_id);
+    """
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+            name, instructions, content='recipes', content_rowid='id'
+        );
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_insert AFTER INSERT ON recipes BEGIN
+            INSERT INTO recipes_fts(rowid, name, instructions) VALUES (new.id, new.name, new.instructions);
+        END;
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_update AFTER UPDATE ON recipes BEGIN
+            INSERT INTO recipes_fts(recipes_fts, rowid, name, instructions)
+                VALUES ('delete', old.id, old.name, old.instructions);
+            INSERT INTO recipes_fts(rowid, name, instructions) VALUES (new.id, new.name, new.instructions);
+        END;
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        with self.connection:
+            self.connection.executescript(self.SCHEMA)
+            try:
+                self.connection.executescript(self.FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite bez modułu FTS5: wyszukiwanie tekstu przez LIKE
+                self.fts = False
+        # Numer przepisu (pozycja w indeksie składników) -> id w bazie
+        self.ids = array('q', (row[0] for row in self.connection.execute("SELECT id FROM recipes ORDER BY id")))
+        self.numbers = None
+        self.cache = OrderedDict()  # id w bazie -> przepis
+        self.recipes = LazyRecipes(self)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def ingredient_lists(self):
+        """Składniki kolejnych przepisów jednym zapytaniem, bez wczytywania nazw i instrukcji"""
+        # Słownik nazw jest mały; tabela połączeń jest czytana w kolejności klucza głównego, bez złączenia
+        names = dict(self.connection.execute("SELECT id, name FROM ingredients"))
+        rows = self.connection.execute(
+            "SELECT recipe_id, ingredient_id FROM recipe_ingredients ORDER BY recipe_id, position")
+        groups = groupby(rows, key=itemgetter(0))
+        group = next(groups, None)
+        for recipe_id in self.ids:
+            if group is not None and group[0] == recipe_id:
+                yield [names[ingredient_id] for _, ingredient_id in group[1]]
+                group = next(groups, None)
+            else:
+                yield []
+
+    def get(self, number):
+        return self.get_many([number])[0]
+
+    def get_many(self, numbers):
+        """Przepisy o podanych numerach, brakujące w pamięci wczytywane paczkami"""
+        cache = self.cache
+        missing = [self.ids[number] for number in numbers if self.ids[number] not in cache]
+        loaded = {}
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            batch = missing[start:start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            for recipe_id, name, instructions in self.connection.execute(
+                    f"SELECT id, name, instructions FROM recipes WHERE id IN ({placeholders})", batch):
+                loaded[recipe_id] = {"name": name, "ingredients": []}
+                if instructions is not None:
+                    loaded[recipe_id]["instructions"] = instructions
+            for recipe_id, name in self.connection.execute(
+                    f"{self.INGREDIENTS_QUERY} WHERE ri.recipe_id IN ({placeholders}) "
+                    "ORDER BY ri.recipe_id, ri.position", batch):
+                loaded[recipe_id]["ingredients"].append(name)
+        recipes = []
+        for number in numbers:
+            recipe_id = self.ids[number]
+            recipe = loaded.get(recipe_id) or cache[recipe_id]
+            cache[recipe_id] = recipe
+            cache.move_to_end(recipe_id)
+            recipes.append(recipe)
+        while len(cache) > self.CACHE_SIZE:
+            cache.popitem(last=False)
+        return recipes
+
+    def _ingredient_ids(self, names):
+        self.connection.executemany("INSERT OR IGNORE INTO ingredients(name) VALUES (?)", ((name,) for name in names))
+        return [self.connection.execute("SELECT id FROM ingredients WHERE name = ?", (name,)).fetchone()[0]
+                for name in names]
+
+    def _write_ingredients(self, recipe_id, ingredients):
+        self.connection.executemany(
+            "INSERT INTO recipe_ingredients(recipe_id, position, ingredient_id) VALUES (?, ?, ?)",
+            ((recipe_id, position, ingredient_id)
+             for position, ingredient_id in enumerate(self._ingredient_ids(ingredients))))
+
+    def add(self, recipe):
+        """Dopisanie przepisu bez przepisywania pozostałych"""
+        with self.connection:
+            self._insert(recipe)
+        return len(self.ids) - 1
+
+    def add_many(self, recipes):
+        """Dopisanie wielu przepisów w jednej transakcji"""
+        with self.connection:
+            for recipe in recipes:
+                self._insert(recipe)
+
+    def _insert(self, recipe):
+        cursor = self.connection.execute("INSERT INTO recipes(name, instructions) VALUES (?, ?)",
+                                         (recipe["name"], recipe.get("instructions")))
+        self._write_ingredients(cursor.lastrowid, recipe["ingredients"])
+        self.ids.append(cursor.lastrowid)
+
+    def update(self, number, recipe):
+        """Zmiana jednego przepisu w miejscu"""
+        recipe_id = self.ids[number]
+        with self.connection:
+            self.connection.execute("UPDATE recipes SET name = ?, instructions = ? WHERE id = ?",
+                                    (recipe["name"], recipe.get("instructions"), recipe_id))
+            self.connection.execute("DELETE FROM recipe_ingredients WHERE recipe_id = ?", (recipe_id,))
+            self._write_ingredients(recipe_id, recipe["ingredients"])
+        self.cache.pop(recipe_id, None)
+
+    def search_text(self, query, limit=50):
+        """Numery przepisów, których nazwa lub instrukcje zawierają wszystkie słowa zapytania"""
+        words = query.split()
+        if not words:
+            return []
+        if self.fts:
+            # Każde słowo jako fraza z dopasowaniem prefiksu
+            match = " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+            rows = self.connection.execute(
+                "SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH ? ORDER BY rank LIMIT ?", (match, limit))
+        else:
+            condition = " AND ".join("(name || ' ' || coalesce(instructions, '')) LIKE ?" for _ in words)
+            rows = self.connection.execute(f"SELECT id FROM recipes WHERE {condition} LIMIT ?",
+                                           [f"%{word}%" for word in words] + [limit])
+        if self.numbers is None or len(self.numbers) != len(self.ids):
+            self.numbers = {recipe_id: number for number, recipe_id in enumerate(self.ids)}
+        return [self.numbers[row[0]] for row in rows]
+
+    def save(self):
+        # Zmiany są zatwierdzane od razu w add i update
+        self.connection.commit()
+
+
+def import_json(json_filename, sqlite_filename):
+    """Jednorazowe przeniesienie przepisów z pliku JSON do bazy SQLite"""
+    with open(json_filename, 'r', encoding='utf-8') as f:
+        recipes = json.load(f)
+    storage = SqliteRecipeStorage(sqlite_filename)
+    storage.add_many(recipes)
+    return len(recipes)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Użycie: python RecipeStorage.py recipes.json recipes.db")
+        sys.exit(2)
+    print(f"Zaimportowano przepisów: {import_json(sys.argv[1], sys.argv[2])}")
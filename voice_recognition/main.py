@@ -19,7 +19,9 @@ class MainWindow(QMainWindow):
     """Główne okno aplikacji"""
     def __init__(self):
         super().__init__()
-        self.recipe_db = RecipeDatabase()
+        # Baza SQLite (RecipeStorage.py recipes.json recipes.db), jeśli została zaimportowana
+        self.recipe_db = RecipeDatabase("recipes.db" if os.path.exists("recipes.db") else "recipes.json")
+        self.displayed_recipes = []
         self.translator = Translator()
         
         # Model Whisper
@@ -231,6 +233,12 @@ class MainWindow(QMainWindow):
 
         recipe_header = QHBoxLayout()
         recipe_header.addWidget(QLabel("Znalezione przepisy"))
+
+        self.search_mode_combo = QComboBox()
+        self.search_mode_combo.addItems(["Wszystkie składniki", "Najlepiej pasujące"])
+        self.search_mode_combo.setToolTip("Najlepiej pasujące: ranking przepisów także z częścią składników")
+        self.search_mode_combo.currentIndexChanged.connect(self.on_search_mode_changed)
+        recipe_header.addWidget(self.search_mode_combo)
         recipe_header.addStretch()
         
         recipe_header.addWidget(QLabel("Tłumacz wybrany przepis na:"))
@@ -367,8 +375,8 @@ class MainWindow(QMainWindow):
         for polish_ingredient in polish_ingredients:
             self.ingredients_list.addItem(polish_ingredient)
 
-        filtered_recipes = self.recipe_db.filter_recipes(polish_ingredients)
-        self.display_recipes(filtered_recipes)
+        filtered_recipes, scores = self.find_recipes(polish_ingredients)
+        self.display_recipes(filtered_recipes, scores)
 
         self.remove_ingredient_button.setEnabled(False)
 
@@ -379,46 +387,6 @@ class MainWindow(QMainWindow):
         
         self.status_label.setText(status_msg)
 
-    def search_recipes_with_current_ingredients(self, ingredients):
-        """Wyszukiwanie przepisów na podstawie aktualnych składników"""
-        if not ingredients:
-            self.recipe_list.clear()
-            self.recipe_list.addItem("Brak składników do wyszukiwania")
-            self.status_label.setText("Brak składników")
-            return
-
-        filtered_recipes = self.recipe_db.filter_recipes(ingredients)
-        self.display_recipes(filtered_recipes)
-
-        self.status_label.setText(f"Aktualne składniki: {len(ingredients)}, znalezione przepisy: {len(filtered_recipes)}")
-
-    def show_recipe(self, item):
-        """Wyświetlanie szczegółów wybranego przepisu - uproszczona wersja"""
-        recipe_name = item.text()
-        if recipe_name in ["Brak przepisów spełniających kryteria", "Brak składników do wyszukiwania"]:
-            return
-
-        current_row = self.recipe_list.row(item)
-
-        current_ingredients = []
-        for i in range(self.ingredients_list.count()):
-            ingredient = self.ingredients_list.item(i).text()
-            current_ingredients.append(ingredient)
-        
-        if current_ingredients:
-            filtered_recipes = self.recipe_db.filter_recipes(current_ingredients)
-            
-            if 0 <= current_row < len(filtered_recipes):
-                selected_recipe = filtered_recipes[current_row]
-                self.recipe_name.setText(f"Przepis: {recipe_name}")
-                self.recipe_ingredients.setText("\n".join(selected_recipe["ingredients"]))
-            else:
-                self.recipe_name.setText("Nie znaleziono przepisu")
-                self.recipe_ingredients.setText("")
-        else:
-            self.recipe_name.setText("Brak składników")
-            self.recipe_ingredients.setText("")
-
     def translate_ingredients_to_polish(self, ingredients, source_lang):
         """Tłumaczenie składników na język polski do wyszukiwania przepisów"""
         if not ingredients:
@@ -502,8 +470,23 @@ class MainWindow(QMainWindow):
         
         return unique_ingredients
 
-    def display_recipes(self, recipes):
+    def find_recipes(self, ingredients):
+        """Wyszukiwanie w wybranym trybie: przepisy i ich pokrycie składników (None przy pełnym dopasowaniu)"""
+        if self.search_mode_combo.currentText() == "Najlepiej pasujące":
+            ranked = self.recipe_db.rank_recipes(ingredients)
+            return [recipe for recipe, _ in ranked], [score for _, score in ranked]
+        return self.recipe_db.filter_recipes(ingredients), None
+
+    def on_search_mode_changed(self):
+        """Ponowne wyszukiwanie aktualnych składników po zmianie trybu"""
+        current_ingredients = [self.ingredients_list.item(i).text() for i in range(self.ingredients_list.count())]
+        if current_ingredients:
+            self.search_recipes_with_current_ingredients(current_ingredients)
+
+    def display_recipes(self, recipes, scores=None):
         """Wyświetlanie przefiltrowanych przepisów"""
+        # Wyniki zostają przy widoku: wiersz listy odpowiada pozycji w displayed_recipes
+        self.displayed_recipes = recipes
         self.recipe_list.clear()
         if not recipes:
             self.recipe_list.addItem("Brak przepisów spełniających kryteria")
@@ -512,6 +495,9 @@ class MainWindow(QMainWindow):
         
         for recipe in recipes:
             self.recipe_list.addItem(recipe["name"])
+        if scores:
+            for row, score in enumerate(scores):
+                self.recipe_list.item(row).setToolTip(f"Dopasowanie: {score:.0%}")
 
         self.translate_recipe_button.setEnabled(False)
 
@@ -528,30 +514,19 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
 
     def show_recipe(self, item):
-        """Wyświetlanie szczegółów wybranego przepisu - uproszczona wersja"""
+        """Wyświetlanie szczegółów wybranego przepisu z listy aktualnie wyświetlanych wyników"""
         recipe_name = item.text()
         if recipe_name in ["Brak przepisów spełniających kryteria", "Brak składników do wyszukiwania"]:
             return
 
         current_row = self.recipe_list.row(item)
-        
-        current_ingredients = []
-        for i in range(self.ingredients_list.count()):
-            ingredient = self.ingredients_list.item(i).text()
-            current_ingredients.append(ingredient)
-        
-        if current_ingredients:
-            filtered_recipes = self.recipe_db.filter_recipes(current_ingredients)
-            
-            if 0 <= current_row < len(filtered_recipes):
-                selected_recipe = filtered_recipes[current_row]
-                self.recipe_name.setText(f"Przepis: {recipe_name}")
-                self.recipe_ingredients.setText("\n".join(selected_recipe["ingredients"]))
-            else:
-                self.recipe_name.setText("Nie znaleziono przepisu")
-                self.recipe_ingredients.setText("")
+
+        if 0 <= current_row < len(self.displayed_recipes):
+            selected_recipe = self.displayed_recipes[current_row]
+            self.recipe_name.setText(f"Przepis: {recipe_name}")
+            self.recipe_ingredients.setText("\n".join(selected_recipe["ingredients"]))
         else:
-            self.recipe_name.setText("Brak składników")
+            self.recipe_name.setText("Nie znaleziono przepisu")
             self.recipe_ingredients.setText("")
 
     def on_ingredient_selection_changed(self):
@@ -591,13 +566,14 @@ class MainWindow(QMainWindow):
     def search_recipes_with_current_ingredients(self, ingredients):
         """Wyszukiwanie przepisów na podstawie aktualnych składników"""
         if not ingredients:
+            self.displayed_recipes = []
             self.recipe_list.clear()
             self.recipe_list.addItem("Brak składników do wyszukiwania")
             self.status_label.setText("Brak składników")
             return
 
-        filtered_recipes = self.recipe_db.filter_recipes(ingredients)
-        self.display_recipes(filtered_recipes)
+        filtered_recipes, scores = self.find_recipes(ingredients)
+        self.display_recipes(filtered_recipes, scores)
 
         self.status_label.setText(f"Aktualne składniki: {len(ingredients)}, znalezione przepisy: {len(filtered_recipes)}")
     
@@ -612,6 +588,7 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.Yes:
             self.ingredients_list.clear()
+            self.displayed_recipes = []
             self.recipe_list.clear()
             self.recipe_list.addItem("Brak składników do wyszukiwania")
             self.status_label.setText("Wszystkie składniki zostały usunięte")
@@ -695,39 +672,17 @@ class MainWindow(QMainWindow):
             return
 
         current_row = self.recipe_list.currentRow()
-        
-        current_ingredients = []
-        for i in range(self.ingredients_list.count()):
-            ingredient = self.ingredients_list.item(i).text()
-            current_ingredients.append(ingredient)
-        
-        if current_ingredients:
-            lang_name = self.lang_label.text()
-            if lang_name != 'Polski' and lang_name != '-':
-                detected_lang_code = None
-                for code, name in {'pl': 'Polski', 'en': 'English', 'es': 'Español', 'fr': 'Français', 'de': 'Deutsch'}.items():
-                    if name == lang_name:
-                        detected_lang_code = code
-                        break
-                
-                if detected_lang_code and detected_lang_code != 'pl':
-                    polish_ingredients = self.translate_ingredients_to_polish(current_ingredients, detected_lang_code)
-                else:
-                    polish_ingredients = current_ingredients
-            else:
-                polish_ingredients = current_ingredients
-            
-            filtered_recipes = self.recipe_db.filter_recipes(polish_ingredients)
-            
-            if 0 <= current_row < len(filtered_recipes):
-                original_recipe = filtered_recipes[current_row]
 
-                selected_items[0].setText(original_recipe["name"])
+        if 0 <= current_row < len(self.displayed_recipes):
+            original_recipe = self.displayed_recipes[current_row]
+
+            selected_items[0].setText(original_recipe["name"])
+
+            self.recipe_name.setText(f"Przepis: {original_recipe['name']}")
+            self.recipe_ingredients.setText("\n".join(original_recipe["ingredients"]))
+
+            QMessageBox.information(self, "Przywracanie", "Przywrócono oryginalną wersję przepisu.")
 
-                self.recipe_name.setText(f"Przepis: {original_recipe['name']}")
-                self.recipe_ingredients.setText("\n".join(original_recipe["ingredients"]))
-                
-                QMessageBox.information(self, "Przywracanie", "Przywrócono oryginalną wersję przepisu.")
 
 def main():
     """Funkcja główna aplikacji"""
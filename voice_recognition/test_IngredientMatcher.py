@@ -0,0 +1,48 @@
+import unittest
+
+from IngredientMatcher import IngredientMatcher
+
+
+class IngredientMatcherTest(unittest.TestCase):
+    def matcher(self, *terms):
+        matcher = IngredientMatcher()
+        for term in terms:
+            matcher.add(term)
+        return matcher
+
+    def test_stem_keeps_diacritics(self):
+        self.assertEqual(IngredientMatcher.stem("mąka"), IngredientMatcher.stem("mąki"))
+        self.assertEqual(IngredientMatcher.stem("mak"), IngredientMatcher.stem("maku"))
+        self.assertNotEqual(IngredientMatcher.stem("mąka"), IngredientMatcher.stem("mak"))
+
+    def test_fleeting_e_only_without_ending(self):
+        self.assertEqual(IngredientMatcher.stem("jajek"), IngredientMatcher.stem("jajka"))
+        self.assertEqual(IngredientMatcher.stem("mleka"), IngredientMatcher.stem("mleko"))
+        self.assertEqual(IngredientMatcher.stem("mleko"), "mlek")
+
+    def test_flour_and_poppy_seed_stay_separate(self):
+        matcher = self.matcher("mąka", "mak", "mleko")
+        self.assertEqual(matcher.matches("mąki"), {"mąka"})
+        self.assertEqual(matcher.matches("mak"), {"mak"})
+        self.assertEqual(matcher.matches("maku"), {"mak"})
+        self.assertEqual(matcher.matches("mleka"), {"mleko"})
+
+    def test_missing_diacritics(self):
+        matcher = self.matcher("mąka", "sól", "łosoś")
+        self.assertEqual(matcher.matches("maka"), {"mąka"})
+        self.assertEqual(matcher.matches("sol"), {"sól"})
+        self.assertEqual(matcher.matches("losos"), {"łosoś"})
+
+    def test_inflection_and_typos(self):
+        matcher = self.matcher("pomidory", "mięso mielone", "ogórek kiszony", "groszek", "proszek do pieczenia",
+                               "oliwa", "oliwki")
+        self.assertEqual(matcher.matches("pomidorów"), {"pomidory"})
+        self.assertEqual(matcher.matches("pomidorrów"), {"pomidory"})
+        self.assertEqual(matcher.matches("mięsa mielonego"), {"mięso mielone"})
+        self.assertEqual(matcher.matches("ogórków kiszonych"), {"ogórek kiszony"})
+        self.assertEqual(matcher.matches("groszku"), {"groszek"})
+        self.assertEqual(matcher.matches("oliwki"), {"oliwki"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import time
+from collections import deque
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from Converter import ConversionCancelled
+from batch import convert_file
+
+
+class ConversionThread(QThread):
+    # Runs queued conversions one after another, so the window stays responsive
+    progress = pyqtSignal(int)  # percent of the current file
+    status = pyqtSignal(str)  # rows, rows/s and ETA of the current file
+    converted = pyqtSignal(str, int, float)  # output path, rows, seconds
+    cancelled = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.jobs = deque()
+        self.cancel_requested = False
+        # The built-in finished signal fires after run() returns, so jobs added in the meantime are not lost
+        self.finished.connect(self._start_pending)
+
+    def add_job(self, path, file_name, file_format, options, read_options, workers=None):
+        self.jobs.append((path, file_name, file_format, options, read_options, workers))
+        if not self.isRunning():
+            self.start()
+
+    def cancel(self):
+        # Stops the current conversion at the next batch and drops the queued ones
+        self.jobs.clear()
+        self.cancel_requested = True
+
+    def _start_pending(self):
+        if self.jobs and not self.isRunning():
+            self.start()
+
+    def run(self):
+        while self.jobs:
+            path, file_name, file_format, options, read_options, workers = self.jobs.popleft()
+            self.cancel_requested = False
+            self.progress.emit(0)
+            self.status.emit(f"{os.path.basename(path)}: wczytywanie... (w kolejce: {len(self.jobs)})")
+            start = time.perf_counter()
+            try:
+                rows, elapsed, _ = convert_file(path, file_name, file_format, options, read_options, workers,
+                                             progress=lambda done, total: self._report(path, start, done, total))
+            except ConversionCancelled:
+                # Do not leave a half-written document behind
+                if os.path.exists(file_name):
+                    os.remove(file_name)
+                self.cancelled.emit(file_name)
+                continue
+            except Exception as e:
+                self.error.emit(f"Błąd: {str(e)}")
+                continue
+            self.progress.emit(100)
+            self.converted.emit(file_name, rows, elapsed)
+
+    def _report(self, path, start, done, total):
+        if self.cancel_requested:
+            raise ConversionCancelled()
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed else 0
+        message = f"{os.path.basename(path)}: {done}"
+        if total:
+            self.progress.emit(min(100, done * 100 // total))
+            message += f"/{total}"
+        message += f" wierszy, {rate:,.0f} wierszy/s"
+        if total and rate and done < total:
+            message += f", pozostało ~{(total - done) / rate:.0f} s"
+        if self.jobs:
+            message += f" (w kolejce: {len(self.jobs)})"
+        self.status.emit(message)
@@ -1,41 +1,646 @@
+import os
+import threading
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache, partial
+from itertools import chain
+
 import pandas as pd
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Pt
+import fpdf.fpdf
 from fpdf import FPDF
+from fpdf.php import UTF8ToUTF16BE
+from fpdf.ttfonts import TTFontFile
 from docx import Document
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+from lxml import etree
+
+from DocxWriter import DocxWriter, TableTemplate
+from formatters import format_series
+from readers import open_reader
+
+# TrueType fonts with Polish characters, as (regular, bold, italic) file names. The first family found in
+# XLSX_CONVERTER_FONTS, the fonts directory next to this file or the system font directories is embedded;
+# without one PDFs fall back to core Arial and latin-1 text.
+FONT_FAMILIES = [
+    ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf", "DejaVuSans-Oblique.ttf"),
+    ("arial.ttf", "arialbd.ttf", "ariali.ttf"),
+    ("Arial.ttf", "Arial Bold.ttf", "Arial Italic.ttf"),
+    ("LiberationSans-Regular.ttf", "LiberationSans-Bold.ttf", "LiberationSans-Italic.ttf"),
+]
+FONT_DIRS = [
+    os.environ.get("XLSX_CONVERTER_FONTS", ""),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts"),
+    os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/usr/share/fonts/TTF",
+    "/usr/share/fonts/truetype/liberation",
+    "/Library/Fonts",
+    "/System/Library/Fonts/Supplemental",
+]
+
+
+@lru_cache(maxsize=None)
+def find_unicode_font():
+    for directory in filter(None, FONT_DIRS):
+        for regular, bold, italic in FONT_FAMILIES:
+            paths = [os.path.join(directory, name) for name in (regular, bold, italic)]
+            if os.path.exists(paths[0]) and os.path.exists(paths[1]):
+                # A missing italic only affects page numbers, so the regular face stands in for it
+                return paths[0], paths[1], paths[2] if os.path.exists(paths[2]) else paths[0]
+    return None
+
+
+@lru_cache(maxsize=None)
+def _ttf_metrics(path):
+    # Parsing a TTF takes a while, so metrics are read once per process instead of once per document
+    ttf = TTFontFile()
+    ttf.getMetrics(path)
+    return {
+        'name': ttf.fullName.replace(' ', '').replace('(', '').replace(')', ''),
+        'desc': {
+            'Ascent': int(round(ttf.ascent, 0)),
+            'Descent': int(round(ttf.descent, 0)),
+            'CapHeight': int(round(ttf.capHeight, 0)),
+            'Flags': ttf.flags,
+            'FontBBox': "[%s %s %s %s]" % tuple(int(round(value, 0)) for value in ttf.bbox),
+            'ItalicAngle': int(ttf.italicAngle),
+            'StemV': int(round(ttf.stemV, 0)),
+            'MissingWidth': int(round(ttf.defaultWidth, 0)),
+        },
+        'up': round(ttf.underlinePosition),
+        'ut': round(ttf.underlineThickness),
+        'cw': ttf.charWidths,
+        'originalsize': os.stat(path).st_size,
+    }
+
+
+# makeSubset parses the whole font file on every document, which dominates small documents such as previews.
+# Subsets are reused for the same font and glyph set; FPDF creates its TTFontFile through its module global.
+class SubsetCachingTTFontFile(TTFontFile):
+    subsets = OrderedDict()
+    lock = threading.Lock()
+
+    def makeSubset(self, file, subset):
+        key = (file, frozenset(subset))
+        with self.lock:
+            cached = self.subsets.get(key)
+            if cached is not None:
+                self.subsets.move_to_end(key)
+        if cached is None:
+            cached = (super().makeSubset(file, subset), self.maxUni, self.codeToGlyph)
+            with self.lock:
+                self.subsets[key] = cached
+                if len(self.subsets) > 16:
+                    self.subsets.popitem(last=False)
+        stream, self.maxUni, self.codeToGlyph = cached
+        return stream
+
+
+fpdf.fpdf.TTFontFile = SubsetCachingTTFontFile
+
+
+# FPDF collects used characters in a list with one entry per character printed, and looks codes up in it
+# when writing the font; a set keeps one entry per glyph. del subset[0] is how FPDF drops code 0.
+class GlyphSubset(set):
+    append = set.add
+
+    def __delitem__(self, index):
+        self.discard(index)
+
+
+# FPDF appends every line to self.buffer with +=, which is quadratic for large documents
+class PDFBuffer:
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+
+    def __iadd__(self, text):
+        self.chunks.append(text)
+        self.length += len(text)
+        return self
+
+    def __len__(self):
+        return self.length
+
+
+# Buffer of a PDF written straight to disk; FPDF only needs its length for the cross-reference offsets
+class PDFFileBuffer:
+    def __init__(self, file_name):
+        self.file = open(file_name, 'wb')
+        self.length = 0
+
+    def __iadd__(self, text):
+        data = text.encode('latin-1')
+        self.file.write(data)
+        self.length += len(data)
+        return self
+
+    def __len__(self):
+        return self.length
 
-# TODO: nie działają polskie znaki w pdf...
-# pewnie trzeba zmienić fpdf na fpdf2
 
 # Custom PDF class with optional page numbering
 class CustomPDF(FPDF):
-    def __init__(self, add_page_numbers=False):
+    def __init__(self, add_page_numbers=False, font_files=None, file_name=None):
         super().__init__()
         self.add_page_numbers = add_page_numbers
-        
+        self.buffer = PDFBuffer()
+        # Column headers drawn as shared form XObjects instead of text on every page (compact mode)
+        self.header_forms = None
+        # With a file name every finished page is written to disk right away instead of at output()
+        self.stream_to_file = file_name is not None
+        if self.stream_to_file:
+            self.buffer = PDFFileBuffer(file_name)
+            self.set_compression(True)
+            self._putheader()
+        # Embedded TrueType font (subset to the used glyphs) when font files are given, core Arial otherwise
+        self.family = 'Sans' if font_files else 'Arial'
+        # Register fonts in a fixed order so pages rendered in other processes use the same font names
+        for style, path in zip(('', 'B', 'I'), font_files or (None, None, None)):
+            if path:
+                self.add_unicode_font(self.family, style, path)
+            self.set_font(self.family, style)
+
+    def add_unicode_font(self, family, style, path):
+        # Same font entry as add_font(uni=True), built from metrics cached in this process
+        metrics = _ttf_metrics(path)
+        fontkey = family.lower() + style
+        self.fonts[fontkey] = {
+            'i': len(self.fonts) + 1, 'type': 'TTF', 'name': metrics['name'], 'desc': metrics['desc'],
+            'up': metrics['up'], 'ut': metrics['ut'], 'cw': metrics['cw'], 'ttffile': path, 'fontkey': fontkey,
+            'subset': GlyphSubset(range(0, 32)), 'unifilename': None,
+        }
+        self.font_files[fontkey] = {'length1': metrics['originalsize'], 'type': "TTF", 'ttffile': path}
+        self.font_files[path] = {'type': "TTF"}
+
+    def glyph_subsets(self):
+        return {fontkey: font['subset'] for fontkey, font in self.fonts.items() if font['type'] == 'TTF'}
+
+    def add_glyphs(self, subsets):
+        # Pages merged from other processes used glyphs this document has not seen
+        for fontkey, subset in subsets.items():
+            self.fonts[fontkey]['subset'].update(subset)
+
+    def get_string_width(self, s):
+        if not self.unifontsubset:
+            return super().get_string_width(s)
+        # FPDF's loop for TrueType fonts, with one lookup per character
+        cw = self.current_font['cw']
+        missing = self.current_font['desc']['MissingWidth'] or 500
+        size = len(cw)
+        if len(s) == 1:
+            # multi_cell measures text one character at a time
+            c = ord(s)
+            return (cw[c] if c < size else missing) * self.font_size / 1000.0
+        return sum(cw[c] if c < size else missing for c in map(ord, s)) * self.font_size / 1000.0
+
+    def add_rendered_page(self, content):
+        # Append a page rendered by another CustomPDF; footer() still runs here, so numbering stays correct
+        self.add_page()
+        self.pages[self.page] = content
+        # The page switched fonts on its own, so the next set_font must not be skipped
+        self.font_family = ''
+
+    def font_state(self, family, style, size):
+        # Captures everything set_font would compute, so apply_font can switch fonts without the lookups
+        self.set_font(family, style, size)
+        return (self.font_family, self.font_style, self.font_size_pt, self.font_family + self.font_style,
+                'BT /F%d %.2f Tf ET' % (self.current_font['i'], self.font_size_pt))
+
+    def apply_font(self, state):
+        family, style, size, fontkey, operator = state
+        if self.font_family == family and self.font_style == style and self.font_size_pt == size:
+            return
+        self.font_family = family
+        self.font_style = style
+        self.font_size_pt = size
+        self.font_size = size / self.k
+        self.current_font = self.fonts[fontkey]
+        self.unifontsubset = self.current_font['type'] == 'TTF'
+        if self.page > 0:
+            self._out(operator)
+
+    def add_header_forms(self, headers, font):
+        # One form per column header, painted in the given font state wherever the header is needed
+        self.apply_font(font)
+        current_font = self.current_font
+        self.header_forms = []
+        for text in headers:
+            if self.unifontsubset:
+                encoded = self._escape(UTF8ToUTF16BE(text, False))
+                current_font['subset'].update(map(ord, text))
+            else:
+                encoded = self._escape(text)
+            self.header_forms.append({
+                'font': current_font,
+                'content': 'BT /F%d %.2f Tf 0 0 Td (%s) Tj ET' % (current_font['i'], self.font_size_pt, encoded),
+                'width': self.get_string_width(text),
+                'size': self.font_size_pt,
+            })
+
+    def header_cell(self, index, w, h, ln=0, align='L'):
+        # Same placement and page breaking as cell() with a single line of text, drawing the header form
+        form = self.header_forms[index]
+        k = self.k
+        if self.y + h > self.page_break_trigger and not self.in_footer and self.accept_page_break():
+            x = self.x
+            self.add_page(self.cur_orientation)
+            self.x = x
+        if w == 0:
+            w = self.w - self.r_margin - self.x
+        if align == 'R':
+            dx = w - self.c_margin - form['width']
+        elif align == 'C':
+            dx = (w - form['width']) / 2.0
+        else:
+            dx = self.c_margin
+        self._out('q 1 0 0 1 %.2f %.2f cm /H%d Do Q' % ((self.x + dx) * k,
+                                                       (self.h - (self.y + .5 * h + .3 * self.font_size)) * k, index))
+        self.lasth = h
+        if ln > 0:
+            self.y += h
+            if ln == 1:
+                self.x = self.l_margin
+        else:
+            self.x += w
+
+    def _putimages(self):
+        super()._putimages()
+        for form in self.header_forms or []:
+            content = zlib.compress(form['content'].encode('latin-1')) if self.compress else form['content']
+            self._newobj()
+            form['n'] = self.n
+            self._out('<</Type /XObject /Subtype /Form /BBox [0 %.2f %.2f %.2f]' % (
+                -form['size'] / 2, form['width'] * self.k, form['size']))
+            self._out('/Resources <</Font <</F%d %d 0 R>>>>' % (form['font']['i'], form['font']['n']))
+            self._out(('/Filter /FlateDecode ' if self.compress else '') + '/Length %d>>' % len(content))
+            self._putstream(content)
+            self._out('endobj')
+
+    def _putxobjectdict(self):
+        super()._putxobjectdict()
+        for index, form in enumerate(self.header_forms or []):
+            self._out('/H%d %d 0 R' % (index, form['n']))
+
+    def _endpage(self):
+        super()._endpage()
+        if self.stream_to_file:
+            self._putpage(self.page)
+            self.pages[self.page] = ''
+
+    def _putpage(self, n):
+        # Page object and content stream, numbered 3 + 2 * (n - 1) and 4 + 2 * (n - 1) as FPDF does
+        content = zlib.compress(self.pages[n].encode('latin-1'))
+        self._newobj()
+        self._out('<</Type /Page /Parent 1 0 R /Resources 2 0 R /Contents %d 0 R>>' % (self.n + 1))
+        self._out('endobj')
+        self._newobj()
+        self._out('<</Filter /FlateDecode /Length %d>>' % len(content))
+        self._putstream(content)
+        self._out('endobj')
+
+    def _putheader(self):
+        # Already written when the file was opened
+        if not self.stream_to_file or len(self.buffer) == 0:
+            super()._putheader()
+
+    def _putpages(self):
+        if not self.stream_to_file:
+            return super()._putpages()
+        # Pages were written as they were finished; only the page tree is left
+        self.offsets[1] = len(self.buffer)
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ' '.join('%d 0 R' % (3 + 2 * i) for i in range(self.page)) + ']')
+        self._out('/Count %d' % self.page)
+        self._out('/MediaBox [0 0 %.2f %.2f]' % (self.fw_pt, self.fh_pt))
+        self._out('>>')
+        self._out('endobj')
+
+    def _enddoc(self):
+        super()._enddoc()
+        if self.stream_to_file:
+            self.buffer.file.close()
+        else:
+            self.buffer = ''.join(self.buffer.chunks)
+
+    def output(self, name='', dest=''):
+        if not self.stream_to_file:
+            return super().output(name, dest)
+        self.close()
+        return ''
+
     def footer(self):
         if self.add_page_numbers:
             self.set_y(-15)  # Position 15 mm from bottom
-            self.set_font('Arial', 'I', 8)
+            self.set_font(self.family, 'I', 8)
             # Page number centered
             self.cell(0, 10, f'Strona {self.page_no()}', 0, 0, 'C')
 
+# Layout of a row page compiled once from the conversion options and columns: header cells, font states and
+# cell geometry. Font states only depend on the fixed font registration order of CustomPDF, so a layout can be
+# reused by any document with the same font files, including the ones rendered in worker processes.
+class PdfLayout:
+    def __init__(self, font_size, interval, single_line, alignment, columns, font_files=None):
+        pdf = CustomPDF(font_files=font_files)
+        self.font_files = font_files
+        self.unicode = font_files is not None
+        self.interval = interval
+        self.single_line = single_line
+        self.align = {"left": 'L', "center": 'C', "right": 'R'}[alignment]
+        self.title = pdf.font_state(pdf.family, '', font_size + 4)  # Slightly larger font for the title
+        self.regular = pdf.font_state(pdf.family, '', font_size)
+        self.bold = pdf.font_state(pdf.family, 'B', font_size)  # Bold font for column names
+
+        # Column headers are encoded and measured once, not once per cell
+        pdf.apply_font(self.bold)
+        self.names = Converter._pdf_texts((str(col) for col in columns), self.unicode)  # Table header row
+        if single_line:
+            self.headers = Converter._pdf_texts((f"{col}: " for col in columns), self.unicode)
+            self.header_widths = [pdf.get_string_width(header) + 2 for header in self.headers]
+        else:
+            self.headers = Converter._pdf_texts((f"{col}:" for col in columns), self.unicode)
+            max_width = pdf.w - pdf.l_margin - pdf.r_margin - 2 * pdf.c_margin
+            self.header_fits = [pdf.get_string_width(header) <= max_width for header in self.headers]
+
+
+@lru_cache(maxsize=32)
+def compile_pdf_layout(font_size, interval, single_line, alignment, columns, font_files=None):
+    return PdfLayout(font_size, interval, single_line, alignment, columns, font_files)
+
+
+# Grid of rows with the header row repeated on every page. Column widths come from the header and a sample of
+# values; wrapped cells and word widths are cached, since spreadsheet columns repeat their values a lot.
+class PdfTable:
+    def __init__(self, pdf, layout, sample):
+        self.pdf = pdf
+        self.layout = layout
+        self.header_height = 0
+        self.word_widths = {layout.regular: {}, layout.bold: {}}
+        self.wrapped = {layout.regular: [{} for _ in layout.names], layout.bold: [{} for _ in layout.names]}
+
+        available = pdf.w - pdf.l_margin - pdf.r_margin
+        padding = 2 * pdf.c_margin
+        natural = []
+        for col, name in enumerate(layout.names):
+            pdf.apply_font(layout.regular)
+            widths = sorted(pdf.get_string_width(text) for text in (sample[col] if sample else ())) or [0]
+            pdf.apply_font(layout.bold)
+            # Most values fit on one line; one long text column can not take more than 40% of the page
+            width = max(pdf.get_string_width(name), widths[int(len(widths) * 0.9)]) + padding
+            natural.append(min(max(width, padding + 5), 0.4 * available))
+        scale = available / sum(natural)
+        self.widths = [width * scale for width in natural]
+
+    def lines(self, col, text, font):
+        cache = self.wrapped[font][col]
+        lines = cache.get(text)
+        if lines is None:
+            if len(cache) > 10000:
+                cache.clear()
+            lines = cache[text] = self._wrap(text, self.widths[col] - 2 * self.pdf.c_margin, self.word_widths[font])
+        return lines
+
+    def _wrap(self, text, max_width, word_widths):
+        # Greedy word wrap like multi_cell, measuring each distinct word once; expects the font to be applied
+        pdf = self.pdf
+        space = word_widths.get(' ')
+        if space is None:
+            space = word_widths[' '] = pdf.get_string_width(' ')
+        lines = []
+        for paragraph in text.replace('\r', '').split('\n'):
+            line, line_width = [], 0
+            for word in paragraph.split(' '):
+                width = word_widths.get(word)
+                if width is None:
+                    width = word_widths[word] = pdf.get_string_width(word)
+                if line and line_width + space + width > max_width:
+                    lines.append(' '.join(line))
+                    line, line_width = [], 0
+                if width > max_width:
+                    # A word wider than the column is broken between characters
+                    chunk = ''
+                    for char in word:
+                        if chunk and pdf.get_string_width(chunk + char) > max_width:
+                            lines.append(chunk)
+                            chunk = ''
+                        chunk += char
+                    word, width = chunk, pdf.get_string_width(chunk)
+                if line:
+                    line_width += space
+                line.append(word)
+                line_width += width
+            lines.append(' '.join(line))
+        return lines
+
+    def draw_header(self):
+        self.pdf.apply_font(self.layout.bold)
+        self._draw([self.lines(col, name, self.layout.bold) for col, name in enumerate(self.layout.names)], True)
+        self.pdf.apply_font(self.layout.regular)
+
+    def draw_row(self, texts):
+        pdf = self.pdf
+        cells = [self.lines(col, text, self.layout.regular) for col, text in enumerate(texts)]
+        height = max(map(len, cells)) * self.layout.interval
+        if pdf.y + height > pdf.page_break_trigger and pdf.y > pdf.t_margin + self.header_height:
+            pdf.add_page()
+            self.draw_header()
+        self._draw(cells)
+
+    def _draw(self, cells, fill=False):
+        pdf = self.pdf
+        interval = self.layout.interval
+        height = max(map(len, cells)) * interval
+        x, y = pdf.l_margin, pdf.y
+        for width, lines in zip(self.widths, cells):
+            pdf.rect(x, y, width, height, 'DF' if fill else 'D')
+            pdf.set_xy(x, y)
+            for line in lines:
+                pdf.cell(width, interval, line, 0, 2, self.layout.align)
+            x += width
+        pdf.set_xy(pdf.l_margin, y + height)
+        if fill:
+            self.header_height = height
+
+
+# Raised from a progress callback to stop a conversion between batches
+class ConversionCancelled(Exception):
+    pass
+
+
+# Parsed workbooks kept in memory, keyed by path, mtime, size and read options, with LRU eviction.
+# Conversions may run on a worker thread while the GUI reads files, so access is locked.
+class WorkbookCache:
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def key(self, path, *options):
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size) + options
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, df):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self.lock:
+            # Drop older versions of the same file before storing the new one
+            for old_key in [k for k in self.entries if k[0] == key[0] and k[1:3] != key[1:3]]:
+                self.size -= self.entries.pop(old_key)[1]
+            if nbytes > self.max_bytes:
+                return
+            while self.entries and self.size + nbytes > self.max_bytes:
+                _, (_, old_bytes) = self.entries.popitem(last=False)
+                self.size -= old_bytes
+            self.entries[key] = (df, nbytes)
+            self.size += nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
 class Converter:
-    def __init__(self, path=""):
+    # Shared by all converters so the GUI and repeated exports reuse parsed files
+    cache = WorkbookCache()
+
+    def __init__(self, path="", streaming=False, sheet_name=0, skiprows=0, nrows=None):
         self.path = path
         self.columns = []
+        self.rows_read = 0
+        # Data rows expected by the running conversion; an estimate in streaming mode, None if unknown
+        self.total_rows = None
+        # Called as progress(rows_done, total_rows) between batches; may raise ConversionCancelled
+        self.progress = None
+        # Conversions stop after this many rows (previews); unlike nrows it does not change what is parsed
+        self.row_limit = None
+        # Decimal places kept when floats are formatted
+        self.float_precision = 6
+        # A profiling.Profiler to record the time and memory of each stage; None means no profiling
+        self.profiler = None
+        # Streaming mode reads rows lazily with openpyxl instead of loading a DataFrame
+        self.streaming = streaming
+        # Sheet index or name, a list of them, or None for all sheets (as in pd.read_excel)
+        self.sheet_name = sheet_name
+        # Window of data rows to read; the header row is always kept
+        self.skiprows = skiprows
+        self.nrows = nrows
+
+    def _read_options(self):
+        sheet_name = tuple(self.sheet_name) if isinstance(self.sheet_name, list) else self.sheet_name
+        return sheet_name, self.skiprows, self.nrows
 
-    def open_file(self):
-        df = pd.read_excel(self.path)
+    def reader(self):
+        # Reader for the file type of path, with the selected sheets and window of rows
+        return open_reader(self.path, sheet_name=self.sheet_name, skiprows=self.skiprows, nrows=self.nrows)
+
+    def open_file(self, usecols=None):
+        wanted = tuple(usecols) if usecols else None
+        # A full parse of the same window can serve any column projection
+        for columns in dict.fromkeys((None, wanted)):
+            df = self.cache.get(self.cache.key(self.path, *self._read_options(), columns))
+            if df is not None:
+                return df[list(wanted)] if wanted and columns is None else df
+        df = self.reader().read(wanted)
+        self.cache.put(self.cache.key(self.path, *self._read_options(), wanted), df)
         return df
 
-    def adjust_columns(self):
-        df = self.open_file()
+    def is_cached(self):
+        # Whether the selected sheets and rows are already parsed, so reading them is instant
+        return self.cache.get(self.cache.key(self.path, *self._read_options(), None)) is not None
+
+    def adjust_columns(self, usecols=None):
+        df = self.open_file(usecols)
         self.columns = df.columns.to_list()
         return df
 
+    def sheet_names(self):
+        return self.reader().sheet_names()
+
+    def probe(self, sample_rows=20):
+        # Header, approximate row count and column types from the first rows only, without parsing the sheet
+        columns, frames = self.stream_frames(batch_size=max(1, sample_rows))
+        try:
+            sample = next(frames, None)
+        finally:
+            frames.close()
+        if sample is None:
+            sample = pd.DataFrame(columns=columns)
+        return columns, self.total_rows, {col: str(dtype) for col, dtype in zip(columns, sample.dtypes)}
+
+    def stream_frames(self, selected_columns=None, batch_size=1000):
+        # Reads the selected columns lazily as DataFrames of batch_size rows instead of parsing the whole file
+        reader = self.reader()
+        if self.row_limit is not None:
+            # Previews stop reading after the rows they show
+            reader.nrows = self.row_limit if self.nrows is None else min(self.nrows, self.row_limit)
+        columns, frames = reader.stream(selected_columns, batch_size)
+        self.columns = reader.columns
+        self.total_rows = reader.total_rows
+        return columns, frames
+
+    def read_column_batches(self, selected_columns=None, batch_size=1000):
+        # Yields chunks of rows as one list of formatted texts per column, formatted a whole column at a time
+        self.rows_read = 0
+        with self._stage("read"):
+            if self.streaming:
+                columns, frames = self.stream_frames(selected_columns, batch_size)
+            else:
+                df = self.adjust_columns(selected_columns)
+                columns = df.columns.to_list()
+                if self.row_limit is not None:
+                    df = df.iloc[:self.row_limit]
+                self.total_rows = len(df)
+                frames = (df.iloc[start:start + batch_size] for start in range(0, len(df), batch_size))
+        if self.row_limit is not None and self.total_rows is not None:
+            self.total_rows = min(self.total_rows, self.row_limit)
+
+        def generate():
+            while True:
+                # Reported before each fetch, i.e. after the previous batch has been rendered
+                if self.progress:
+                    self.progress(self.rows_read, self.total_rows)
+                with self._stage("read"):
+                    frame = next(frames, None)
+                if frame is None:
+                    return
+                self.rows_read += len(frame)
+                with self._stage("format"):
+                    batch = [format_series(frame.iloc[:, i], self.float_precision) for i in range(frame.shape[1])]
+                if self.profiler:
+                    self.profiler.add_rows("read", len(frame))
+                    self.profiler.add_rows("format", len(frame))
+                yield batch
+
+        return columns, generate()
+
+    def _stage(self, name):
+        # Times the block as a stage of the conversion when profiling is enabled
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+
+    @staticmethod
+    def _pdf_texts(values, unicode=False):
+        texts = list(values)
+        if unicode:
+            return texts
+        # Core fonts only cover latin-1; one round trip per column instead of one per cell
+        return '\0'.join(texts).encode('latin-1', 'replace').decode('latin-1').split('\0')
+
     def remove_empty_lines(self, text):
         lines = text.split('\n')
         non_empty_lines = [line for line in lines if line.strip() != '']
@@ -43,60 +648,136 @@ class Converter:
 
     def convert_into_pdf(self, font_size=10, interval=20, title="", file_name="mygfg.pdf",
                          selected_columns=None, single_line=True, alignment="left",
-                         add_title_page=False, description="", add_page_numbers=False):
-        df = self.adjust_columns()
-        if selected_columns:
-            df = df[selected_columns]
-            
-        # Use CustomPDF with page numbering option
-        pdf = CustomPDF(add_page_numbers=add_page_numbers)
-        pdf.set_font("Arial", size=font_size)
+                         add_title_page=False, description="", add_page_numbers=False, workers=None,
+                         unicode_font=True, compact=False, table=False):
+        columns, batches = self.read_column_batches(selected_columns)
 
-        if add_title_page:
+        font_files = find_unicode_font() if unicode_font else None
+        layout = compile_pdf_layout(font_size, interval, single_line, alignment, tuple(columns), font_files)
+
+        # Use CustomPDF with page numbering option; compact output is written to disk page by page
+        pdf = CustomPDF(add_page_numbers=add_page_numbers, font_files=font_files,
+                        file_name=file_name if compact else None)
+        try:
+            with self._stage("render"):
+                self._write_pdf(pdf, layout, batches, title, description, add_title_page, workers, compact, table)
+        except BaseException:
+            if pdf.stream_to_file:
+                pdf.buffer.file.close()
+            raise
+        self._count_rendered_rows()
+        with self._stage("write"):
+            pdf.output(file_name)
+
+    def _count_rendered_rows(self):
+        if self.profiler:
+            self.profiler.add_rows("render", self.rows_read)
+
+    def _write_pdf(self, pdf, layout, batches, title, description, add_title_page, workers, compact, table):
+        interval = layout.interval
+        if compact and not table:
+            pdf.add_header_forms(layout.headers, layout.bold)
+        pdf.apply_font(layout.regular)
+
+        # Without a title page the block only gets a page when there is something to show
+        if add_title_page or title or description:
             pdf.add_page()
             if title:
-                pdf.set_font("Arial", size=font_size + 4)  # Slightly larger font for the title
-                pdf.cell(0, 10, title.encode('latin-1', 'replace').decode('latin-1'), ln=True, align='C')
-                pdf.set_font("Arial", size=font_size)  # Reset font size
+                pdf.apply_font(layout.title)
+                pdf.cell(0, 10, self._pdf_texts([title], layout.unicode)[0], ln=True, align='C')
+                pdf.apply_font(layout.regular)
             if description:
-                pdf.multi_cell(0, interval, description.encode('latin-1', 'replace').decode('latin-1'), align='L')
+                pdf.multi_cell(0, interval, self._pdf_texts([description], layout.unicode)[0], align='L')
+
+        if table:
+            # Pages of a table depend on the rows before them, so it is always rendered here
+            self._render_pdf_table(pdf, layout, batches, new_page=add_title_page or pdf.page == 0)
+        elif workers and workers > 1:
+            if add_title_page:
+                # The first row shares the title page, so it is rendered here
+                first_batch = next(batches, None)
+                if first_batch:
+                    self._render_pdf_rows(pdf, layout, [[values[:1] for values in first_batch]],
+                                          new_page_first=False)
+                    rest = [values[1:] for values in first_batch]
+                    batches = chain([rest] if rest[0] else [], batches)
+            self._render_pdf_parallel(pdf, layout, batches, workers, compact)
         else:
-            if title or description:
-                pdf.add_page()
-                if title:
-                    pdf.set_font("Arial", size=font_size + 4)  # Slightly larger font for the title
-                    pdf.cell(0, 10, title.encode('latin-1', 'replace').decode('latin-1'), ln=True, align='C')
-                    pdf.set_font("Arial", size=font_size)  # Reset font size
-                if description:
-                    pdf.multi_cell(0, interval, description.encode('latin-1', 'replace').decode('latin-1'), align='L')
-
-        align_map = {"left": 'L', "center": 'C', "right": 'R'}
-
-        for index, row in df.iterrows():
-            if index == 0 and not add_title_page:
-                pdf.add_page()  # Add the first page only if there's no title page
-            elif index > 0:
-                pdf.add_page()  # Add a new page for each row except the first one if there's no title page
-            for col, value in row.items():
-                if single_line:
-                    pdf.set_font("Arial", 'B', size=font_size)  # Bold font for column names
-                    col_width = pdf.get_string_width(f"{col}: ") + 2
-                    x_before = pdf.get_x()
-                    y_before = pdf.get_y()
-                    pdf.multi_cell(col_width, interval, f"{col}: ".encode('latin-1', 'replace').decode('latin-1'),
-                                   align=align_map[alignment])
-                    pdf.set_xy(x_before + col_width, y_before)
-                    pdf.set_font("Arial", size=font_size)  # Regular font for content
-                    pdf.multi_cell(0, interval, f"{value}".encode('latin-1', 'replace').decode('latin-1'),
-                                   align=align_map[alignment])
-                else:
-                    pdf.set_font("Arial", 'B', size=font_size)  # Bold font for column names
-                    pdf.multi_cell(0, interval, f"{col}:".encode('latin-1', 'replace').decode('latin-1'),
-                                   align=align_map[alignment])
-                    pdf.set_font("Arial", size=font_size)  # Regular font for other text
-                    pdf.multi_cell(0, interval, str(value).encode('latin-1', 'replace').decode('latin-1'),
-                                   align=align_map[alignment])
-        pdf.output(file_name)
+            self._render_pdf_rows(pdf, layout, batches, new_page_first=not add_title_page)
+
+    def _render_pdf_rows(self, pdf, layout, batches, new_page_first=True):
+        interval = layout.interval
+        align = layout.align
+        headers = layout.headers
+
+        index = 0
+        for batch in batches:
+            for row in zip(*[self._pdf_texts(values, layout.unicode) for values in batch]):
+                if index > 0 or new_page_first:
+                    pdf.add_page()  # Every row starts a new page, except the first one on a title page
+                index += 1
+                for col, value in enumerate(row):
+                    fits = layout.single_line or layout.header_fits[col]
+                    if pdf.header_forms is not None and fits:
+                        # Header forms carry their own font, so the page stays in the regular one
+                        pdf.apply_font(layout.regular)
+                        if layout.single_line:
+                            pdf.header_cell(col, layout.header_widths[col], interval, 0, align)
+                        else:
+                            pdf.header_cell(col, 0, interval, 1, align)
+                    else:
+                        pdf.apply_font(layout.bold)
+                        if layout.single_line:
+                            # A header always fits its measured width, so a plain cell keeps us on the same line
+                            pdf.cell(layout.header_widths[col], interval, headers[col], 0, 0, align)
+                        elif fits:
+                            pdf.cell(0, interval, headers[col], 0, 1, align)
+                        else:
+                            pdf.multi_cell(0, interval, headers[col], align=align)
+                    pdf.apply_font(layout.regular)
+                    pdf.multi_cell(0, interval, value, align=align)
+
+    def _render_pdf_table(self, pdf, layout, batches, new_page=True):
+        first_batch = next(batches, None)
+        if first_batch is None:
+            return
+        texts = [self._pdf_texts(values, layout.unicode) for values in first_batch]
+        table = PdfTable(pdf, layout, texts)
+        if new_page:
+            pdf.add_page()
+        pdf.set_fill_color(230)  # Light grey header row
+        table.draw_header()
+        for row in zip(*texts):
+            table.draw_row(row)
+        for batch in batches:
+            for row in zip(*[self._pdf_texts(values, layout.unicode) for values in batch]):
+                table.draw_row(row)
+
+    @staticmethod
+    def _render_shards(render_shard, batches, workers):
+        # Renders each batch with render_shard(batch) in a worker process and yields the results in order
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(render_shard, batch))
+                # Bound the number of shards in flight so memory does not grow with the sheet
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _render_pdf_parallel(self, pdf, layout, batches, workers, compact=False):
+        # Each batch is rendered in a worker process and its pages are merged back in order
+        for shard in self._render_shards(partial(_render_pdf_shard, layout, compact=compact), batches, workers):
+            self._merge_pdf_shard(pdf, shard)
+
+    @staticmethod
+    def _merge_pdf_shard(pdf, shard):
+        pages, subsets = shard
+        for content in pages:
+            pdf.add_rendered_page(content)
+        # The embedded font subset has to cover the glyphs used on the merged pages too
+        pdf.add_glyphs(subsets)
 
     # Helper function to add page numbers in Word documents
     def _add_page_number(self, doc):
@@ -123,10 +804,13 @@ class Converter:
 
     def convert_into_word(self, font_size=10, title="", file_name="TextToWord.docx",
                           selected_columns=None, line_spacing=1.0, single_line=True, alignment="left",
-                          add_title_page=False, description="", add_page_numbers=False):
-        df = self.adjust_columns()
-        if selected_columns:
-            df = df[selected_columns]
+                          add_title_page=False, description="", add_page_numbers=False, workers=None,
+                          engine="python-docx", table=False):
+        columns, batches = self.read_column_batches(selected_columns)
+        if engine == "fast":
+            self._convert_into_word_fast(columns, batches, font_size, title, file_name, line_spacing, single_line,
+                                         alignment, add_title_page, description, add_page_numbers, table)
+            return
         doc = Document()
         if add_title_page:
             if title:
@@ -147,29 +831,164 @@ class Converter:
                 description_run = description_paragraph.add_run(description)
                 description_run.font.size = Pt(font_size + 2)  # Larger font for the description
 
-        align_map = {"left": WD_ALIGN_PARAGRAPH.LEFT, "center": WD_ALIGN_PARAGRAPH.CENTER,
-                     "right": WD_ALIGN_PARAGRAPH.RIGHT}
+        with self._stage("render"):
+            if table:
+                if add_title_page and (title or description):
+                    doc.add_page_break()
+                self._render_word_table(doc, columns, batches, font_size, alignment)
+            else:
+                self._render_word_pages(doc, columns, batches, (font_size, line_spacing, single_line, alignment),
+                                        add_title_page, workers)
+        self._count_rendered_rows()
 
-        for index, row in df.iterrows():
-            if index > 0 or (index == 0 and add_title_page):
-                doc.add_page_break()  # Add a new page for each row except the first one if there's no title page
-            for col, value in row.items():
-                paragraph = doc.add_paragraph()
-                paragraph.alignment = align_map[alignment]
-                run = paragraph.add_run(f"{col}: ")
-                run.bold = True  # Bold font for column names
-                run.font.size = Pt(font_size)
-                if single_line:
-                    run = paragraph.add_run(f" {value}")
-                else:
-                    run = paragraph.add_run()
-                    run.add_break()
-                    run = paragraph.add_run(str(value))
-                run.font.size = Pt(font_size)
-                paragraph_format = paragraph.paragraph_format
-                paragraph_format.line_spacing = line_spacing  # Set line spacing
         # Add page numbering only if requested
         if add_page_numbers:
             self._add_page_number(doc)
             
-        doc.save(file_name)
+        with self._stage("write"):
+            doc.save(file_name)
+
+    def _render_word_pages(self, doc, columns, batches, row_options, add_title_page, workers):
+        if not add_title_page:
+            # The first row stays on the first page, every later row starts with a page break
+            first_batch = next(batches, None)
+            if first_batch:
+                self._splice_word_body(doc, _render_word_body(columns, [values[:1] for values in first_batch],
+                                                              row_options, page_break_first=False))
+                rest = [values[1:] for values in first_batch]
+                batches = chain([rest] if rest[0] else [], batches)
+        if workers and workers > 1:
+            for body in self._render_shards(partial(_render_word_shard, columns, row_options=row_options), batches,
+                                            workers):
+                self._splice_word_body(doc, parse_xml(body))
+        else:
+            for batch in batches:
+                self._splice_word_body(doc, _render_word_body(columns, batch, row_options))
+
+    def _render_word_table(self, doc, columns, batches, font_size, alignment):
+        # Rows are built as WordprocessingML text and parsed a batch at a time into one table
+        batches, template = self._word_table_template(columns, batches, font_size, alignment)
+        table = parse_xml(template.standalone(''))
+        doc.element.body.sectPr.addprevious(table)
+        for batch in batches:
+            rows = zip(*batch)
+            for row in list(parse_xml(template.standalone(template.rows(rows), header=False))):
+                if row.tag == qn('w:tr'):
+                    table.append(row)
+
+    def _word_table_template(self, columns, batches, font_size, alignment):
+        # Column widths follow the header and a sample of values from the first batch
+        first_batch = next(batches, None)
+        template = TableTemplate(columns, self._table_weights(columns, first_batch), font_size, alignment)
+        return chain([first_batch] if first_batch else [], batches), template
+
+    @staticmethod
+    def _table_weights(columns, sample):
+        # Characters a column needs for its header or most of its values, capped so one long text
+        # column does not squeeze all the others
+        weights = []
+        for col, values in zip(columns, sample or [[] for _ in columns]):
+            lengths = sorted(len(value) for value in values) or [0]
+            weights.append(min(40, max(4, len(str(col)), lengths[int(len(lengths) * 0.9)])))
+        return weights
+
+    def _convert_into_word_fast(self, columns, batches, font_size, title, file_name, line_spacing, single_line,
+                                alignment, add_title_page, description, add_page_numbers, table=False):
+        # Streams WordprocessingML straight into the archive instead of building a python-docx tree.
+        # Rows are written as they are rendered, so "write" only covers creating and closing the archive
+        with self._stage("write"), DocxWriter(file_name, font_size=font_size, line_spacing=line_spacing,
+                                              alignment=alignment, add_page_numbers=add_page_numbers) as writer:
+            with self._stage("render"):
+                self._write_word_fast(writer, columns, batches, font_size, title, single_line, alignment,
+                                      add_title_page, description, table)
+            self._count_rendered_rows()
+
+    def _write_word_fast(self, writer, columns, batches, font_size, title, single_line, alignment, add_title_page,
+                         description, table):
+        if title:
+            writer.add_title(title)
+        if description:
+            writer.add_description(description)
+        if table:
+            if add_title_page and (title or description):
+                writer.add_page_break()
+            batches, template = self._word_table_template(columns, batches, font_size, alignment)
+            writer.add_table_start(template)
+            for batch in batches:
+                writer.add_table_rows(template, zip(*batch))
+            writer.add_table_end()
+            return
+        template = writer.row_template(columns, single_line)
+        index = 0
+        for batch in batches:
+            for row in zip(*batch):
+                writer.add_row(template, row, page_break=index > 0 or add_title_page)
+                index += 1
+
+    def _render_word_rows(self, doc, columns, batches, font_size, line_spacing, single_line, alignment,
+                          page_break_first=True, target=None):
+        align_map = {"left": WD_ALIGN_PARAGRAPH.LEFT, "center": WD_ALIGN_PARAGRAPH.CENTER,
+                     "right": WD_ALIGN_PARAGRAPH.RIGHT}
+
+        headers = [f"{col}: " for col in columns]
+        index = 0
+        for batch in batches:
+            for row in zip(*batch):
+                if index > 0 or page_break_first:
+                    doc.add_page_break()  # Every row starts a new page, except the first one under the title
+                index += 1
+                for header, value in zip(headers, row):
+                    paragraph = doc.add_paragraph()
+                    paragraph.alignment = align_map[alignment]
+                    run = paragraph.add_run(header)
+                    run.bold = True  # Bold font for column names
+                    run.font.size = Pt(font_size)
+                    if single_line:
+                        run = paragraph.add_run(f" {value}")
+                    else:
+                        run = paragraph.add_run()
+                        run.add_break()
+                        run = paragraph.add_run(value)
+                    run.font.size = Pt(font_size)
+                    paragraph_format = paragraph.paragraph_format
+                    paragraph_format.line_spacing = line_spacing  # Set line spacing
+                if target is not None:
+                    # python-docx scans the whole body on every append, so finished rows are moved out
+                    self._move_word_body(doc.element.body, target)
+
+    @staticmethod
+    def _move_word_body(body, target):
+        for element in list(body):
+            if element.tag != qn('w:sectPr'):
+                target.append(element)
+
+    @staticmethod
+    def _splice_word_body(doc, body):
+        # Move the paragraphs of a rendered sub-document in front of the final section properties
+        sect_pr = doc.element.body.sectPr
+        for element in list(body):
+            sect_pr.addprevious(element)
+
+
+def _render_pdf_shard(layout, batch, compact=False):
+    # Runs in a worker process; page numbers are added when the pages are merged
+    pdf = CustomPDF(font_files=layout.font_files)
+    if compact:
+        # Only the form names end up on the pages; the forms themselves are written by the merging document
+        pdf.add_header_forms(layout.headers, layout.bold)
+    Converter()._render_pdf_rows(pdf, layout, [batch])
+    return [pdf.pages[n] for n in range(1, pdf.page + 1)], pdf.glyph_subsets()
+
+
+def _render_word_body(columns, batch, row_options, page_break_first=True):
+    # Renders rows into a detached body that can be spliced into the final document
+    doc = Document()
+    body = parse_xml(f"<w:body {nsdecls('w')}/>")
+    Converter()._render_word_rows(doc, columns, [batch], *row_options, page_break_first=page_break_first,
+                                  target=body)
+    return body
+
+
+def _render_word_shard(columns, batch, row_options):
+    # Runs in a worker process; the body travels back as XML
+    return etree.tostring(_render_word_body(columns, batch, row_options))
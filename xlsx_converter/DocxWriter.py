@@ -0,0 +1,204 @@
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+# Minimal WordprocessingML package written straight into the zip archive. Rows are streamed into
+# word/document.xml as they come, so memory use does not depend on the number of rows.
+
+W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+R_NS = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+CONTENT_TYPES = (
+    XML_HEADER +
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '<Override PartName="/word/footer1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml"/>'
+    '</Types>'
+)
+
+PACKAGE_RELS = (
+    XML_HEADER +
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+DOCUMENT_RELS = (
+    XML_HEADER +
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footer" Target="footer1.xml"/>'
+    '</Relationships>'
+)
+
+FOOTER = (
+    XML_HEADER +
+    f'<w:ftr {W_NS}><w:p><w:pPr><w:jc w:val="center"/></w:pPr><w:r>'
+    '<w:fldChar w:fldCharType="begin"/><w:instrText xml:space="preserve">PAGE</w:instrText>'
+    '<w:fldChar w:fldCharType="end"/></w:r></w:p></w:ftr>'
+)
+
+# Same page size and margins as the python-docx default template
+SECTION = (
+    '<w:sectPr>{footer}<w:pgSz w:w="12240" w:h="15840"/>'
+    '<w:pgMar w:top="1440" w:right="1800" w:bottom="1440" w:left="1800" '
+    'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr>'
+)
+
+PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+ALIGNMENTS = {"left": "left", "center": "center", "right": "right"}
+
+# Width of the text area between the SECTION margins, in twentieths of a point
+TEXT_WIDTH = 12240 - 2 * 1800
+
+TABLE_BORDERS = ''.join(f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="auto"/>'
+                        for side in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV'))
+
+# Characters that are not allowed in XML 1.0
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _text(text):
+    # Same handling of line breaks and tabs as python-docx's add_run
+    text = escape(INVALID_XML_CHARS.sub('', text))
+    text = text.replace('\t', '</w:t><w:tab/><w:t xml:space="preserve">')
+    return text.replace('\n', '</w:t><w:br/><w:t xml:space="preserve">')
+
+
+class TableTemplate:
+    # Markup of a table with fixed column widths whose header row Word repeats on every page.
+    # Shared by the fast writer and the python-docx engine, which parses it into its tree.
+    def __init__(self, columns, weights, font_size=10, alignment="left"):
+        total = sum(weights) or 1
+        widths = [TEXT_WIDTH * weight // total for weight in weights]
+        size = font_size * 2  # Half-points
+        self.cell_start = (f'<w:tc><w:p><w:pPr><w:spacing w:after="0"/><w:jc w:val="{ALIGNMENTS[alignment]}"/>'
+                           f'</w:pPr><w:r><w:rPr><w:sz w:val="{size}"/><w:szCs w:val="{size}"/></w:rPr>'
+                           '<w:t xml:space="preserve">')
+        self.cell_end = '</w:t></w:r></w:p></w:tc>'
+        header_cell_start = self.cell_start.replace('<w:rPr>', '<w:rPr><w:b/>')
+        self.start = (
+            f'<w:tbl><w:tblPr><w:tblW w:w="{sum(widths)}" w:type="dxa"/><w:tblBorders>{TABLE_BORDERS}'
+            '</w:tblBorders><w:tblLayout w:type="fixed"/></w:tblPr><w:tblGrid>' +
+            ''.join(f'<w:gridCol w:w="{width}"/>' for width in widths) + '</w:tblGrid>'
+        )
+        self.header = ('<w:tr><w:trPr><w:tblHeader/></w:trPr>' +
+                       ''.join(f'{header_cell_start}{_text(str(col))}{self.cell_end}' for col in columns) + '</w:tr>')
+
+    def rows(self, rows):
+        cell_start, cell_end = self.cell_start, self.cell_end
+        return ''.join('<w:tr>' + ''.join(f'{cell_start}{_text(value)}{cell_end}' for value in row) + '</w:tr>'
+                       for row in rows)
+
+    def standalone(self, rows_xml, header=True):
+        # A complete table element with namespace declarations, for parsing outside of a document
+        return self.start.replace('<w:tbl>', f'<w:tbl {W_NS}>', 1) + (self.header if header else '') + \
+            rows_xml + '</w:tbl>'
+
+
+class DocxWriter:
+    def __init__(self, file_name, font_size=10, line_spacing=1.0, alignment="left", add_page_numbers=False):
+        self.font_size = font_size
+        self.line_spacing = line_spacing
+        self.alignment = alignment
+        self.add_page_numbers = add_page_numbers
+        self.archive = zipfile.ZipFile(file_name, 'w', zipfile.ZIP_DEFLATED)
+        self.document = self.archive.open('word/document.xml', 'w')
+        self._write(XML_HEADER + f'<w:document {W_NS} {R_NS}><w:body>')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write(self, xml):
+        self.document.write(xml.encode('utf-8'))
+
+    def _styles(self):
+        # Shared styles replace the per-paragraph and per-run formatting python-docx writes
+        size = self.font_size * 2  # Half-points
+        line = round(self.line_spacing * 240)
+        return (
+            XML_HEADER +
+            f'<w:styles {W_NS}>'
+            f'<w:docDefaults><w:rPrDefault><w:rPr><w:sz w:val="{size}"/><w:szCs w:val="{size}"/></w:rPr>'
+            '</w:rPrDefault></w:docDefaults>'
+            '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+            '<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/>'
+            '<w:basedOn w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="480"/><w:outlineLvl w:val="0"/>'
+            f'</w:pPr><w:rPr><w:b/><w:sz w:val="{size + 12}"/><w:szCs w:val="{size + 12}"/></w:rPr></w:style>'
+            '<w:style w:type="paragraph" w:styleId="Description"><w:name w:val="Description"/>'
+            f'<w:basedOn w:val="Normal"/><w:rPr><w:sz w:val="{size + 4}"/><w:szCs w:val="{size + 4}"/></w:rPr>'
+            '</w:style>'
+            '<w:style w:type="paragraph" w:styleId="Row"><w:name w:val="Row"/><w:basedOn w:val="Normal"/>'
+            f'<w:pPr><w:spacing w:line="{line}" w:lineRule="auto"/><w:jc w:val="{ALIGNMENTS[self.alignment]}"/>'
+            '</w:pPr></w:style>'
+            '<w:style w:type="character" w:styleId="ColumnName"><w:name w:val="Column Name"/>'
+            '<w:rPr><w:b/></w:rPr></w:style>'
+            '</w:styles>'
+        )
+
+    def add_title(self, title):
+        self._write(f'<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr>'
+                    f'<w:r><w:t xml:space="preserve">{_text(title)}</w:t></w:r></w:p>')
+
+    def add_description(self, description):
+        self._write(f'<w:p><w:pPr><w:pStyle w:val="Description"/></w:pPr>'
+                    f'<w:r><w:t xml:space="preserve">{_text(description)}</w:t></w:r></w:p>')
+
+    def row_template(self, columns, single_line=True):
+        # Column headers are rendered once; each row only fills in the values
+        if single_line:
+            value_start = '<w:r><w:t xml:space="preserve"> '
+        else:
+            value_start = '<w:r><w:br/></w:r><w:r><w:t xml:space="preserve">'
+        return [
+            '<w:p><w:pPr><w:pStyle w:val="Row"/></w:pPr><w:r><w:rPr><w:rStyle w:val="ColumnName"/></w:rPr>'
+            f'<w:t xml:space="preserve">{_text(f"{col}: ")}</w:t></w:r>{value_start}'
+            for col in columns
+        ]
+
+    def add_row(self, template, values, page_break=False):
+        parts = [PAGE_BREAK] if page_break else []
+        for header, value in zip(template, values):
+            parts.append(f'{header}{_text(value)}</w:t></w:r></w:p>')
+        self._write(''.join(parts))
+
+    def add_page_break(self):
+        self._write(PAGE_BREAK)
+
+    def add_table_start(self, template):
+        self._write(template.start + template.header)
+
+    def add_table_rows(self, template, rows):
+        self._write(template.rows(rows))
+
+    def add_table_end(self):
+        self._write('</w:tbl>')
+
+    def close(self):
+        if self.archive is None:
+            return
+        footer = '<w:footerReference w:type="default" r:id="rId2"/>' if self.add_page_numbers else ''
+        self._write(SECTION.format(footer=footer) + '</w:body></w:document>')
+        self.document.close()
+        self.archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        self.archive.writestr('_rels/.rels', PACKAGE_RELS)
+        self.archive.writestr('word/_rels/document.xml.rels', DOCUMENT_RELS)
+        self.archive.writestr('word/styles.xml', self._styles())
+        self.archive.writestr('word/footer1.xml', FOOTER)
+        self.archive.close()
+        self.archive = None
@@ -0,0 +1,172 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Converter import Converter
+from profiling import Profiler
+from readers import READERS
+
+
+def conversion_options(settings):
+    # Maps a settings.json written by Interface.save_settings to convert_into_* arguments
+    file_format = settings.get("format", "docx")
+    font_size = int(settings.get("font_size") or 10)
+    interval = int(settings.get("interval") or 1)
+    options = {
+        "font_size": font_size,
+        "title": settings.get("title", "") if settings.get("title_chk_state", False) else "",
+        "description": settings.get("description", "") if settings.get("description_chk_state", False) else "",
+        "add_title_page": settings.get("title_page_chk_state", False),
+        "single_line": settings.get("single_line", False),
+        "alignment": settings.get("alignment", "left"),
+        "add_page_numbers": settings.get("page_numbering", False),
+        "table": settings.get("table", False),
+    }
+    if file_format == "pdf":
+        options["interval"] = interval
+        options["compact"] = settings.get("compact_pdf", False)
+    else:
+        options["line_spacing"] = interval
+        options["engine"] = "fast" if settings.get("fast_docx", False) else "python-docx"
+    return file_format, options
+
+
+def find_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(path for path in glob.glob(os.path.join(pattern, "*"))
+                                if os.path.splitext(path)[1].lower() in READERS))
+        else:
+            paths.extend(sorted(glob.glob(pattern)))
+    # Excel lock files (~$name.xlsx) are not workbooks
+    return [path for path in dict.fromkeys(paths) if not os.path.basename(path).startswith("~$")]
+
+
+def output_paths(paths, output_dir, file_format):
+    # Output file of each input; inputs that would share one (report.xlsx and report.csv) keep their extension
+    # in the name, and a clash that remains (same file name in two directories with -o) is an error
+    def target(path, keep_extension):
+        name, extension = os.path.splitext(os.path.basename(path))
+        if keep_extension:
+            name = f"{name}_{extension.lstrip('.')}"
+        return os.path.join(output_dir or os.path.dirname(path), f"{name}.{file_format}")
+
+    def clashes(targets):
+        seen = {}
+        for path, output_path in targets.items():
+            seen.setdefault(os.path.normcase(os.path.abspath(output_path)), []).append(path)
+        return [group for group in seen.values() if len(group) > 1]
+
+    targets = {path: target(path, False) for path in paths}
+    for group in clashes(targets):
+        for path in group:
+            targets[path] = target(path, True)
+    remaining = clashes(targets)
+    if remaining:
+        raise ValueError("; ".join(f"{', '.join(group)} would be written to the same file" for group in remaining))
+    return targets
+
+
+def convert_file(path, output_path, file_format, options, read_options, workers=None, progress=None, profile=False):
+    # Returns the number of rows, the seconds taken and the stage report (None unless profile is set)
+    start = time.perf_counter()
+    converter = Converter(path, **read_options)
+    converter.progress = progress
+    if profile:
+        converter.profiler = Profiler()
+    if file_format == "pdf":
+        converter.convert_into_pdf(file_name=output_path, workers=workers, **options)
+    else:
+        converter.convert_into_word(file_name=output_path, workers=workers, **options)
+    return converter.rows_read, time.perf_counter() - start, converter.profiler and converter.profiler.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Excel, CSV, Parquet and Feather files to PDF/DOCX "
+                                                 "without the GUI")
+    parser.add_argument("inputs", nargs="+", help="files, glob patterns or directories with supported files")
+    parser.add_argument("-s", "--settings", default="settings.json",
+                        help="settings file in the format saved by the GUI (default: settings.json)")
+    parser.add_argument("-o", "--output-dir", help="where to write results (default: next to each workbook)")
+    parser.add_argument("-f", "--format", choices=["pdf", "docx"], help="overrides the format from the settings")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of workbooks converted at the same time (default: CPU count)")
+    parser.add_argument("--sheet", action="append",
+                        help="sheet name or index to convert, can be repeated; 'all' for every sheet "
+                             "(default: first sheet)")
+    parser.add_argument("--skip-rows", type=int, default=0, help="data rows to skip after the header")
+    parser.add_argument("--rows", type=int, help="number of data rows to convert (default: all)")
+    parser.add_argument("--profile", metavar="JSON",
+                        help="write the time, rows and peak memory of each conversion stage per file to a report")
+    args = parser.parse_args(argv)
+
+    with open(args.settings, 'r', encoding='utf-8') as f:
+        settings = json.load(f)
+    if args.format:
+        settings["format"] = args.format
+    file_format, options = conversion_options(settings)
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        print("No input files found", file=sys.stderr)
+        return 2
+    try:
+        targets = output_paths(paths, args.output_dir, file_format)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.sheet and "all" in args.sheet:
+        sheet_name = None
+    elif args.sheet:
+        sheet_name = [int(sheet) if sheet.isdigit() else sheet for sheet in args.sheet]
+    else:
+        sheet_name = 0
+    read_options = {"streaming": settings.get("streaming", False), "sheet_name": sheet_name,
+                    "skiprows": args.skip_rows, "nrows": args.rows}
+
+    jobs = max(1, min(args.jobs or 1, len(paths)))
+    # Row-level workers only when files are converted one at a time, to avoid nested process pools
+    workers = os.cpu_count() if settings.get("parallel", False) and jobs == 1 else None
+
+    failures = 0
+    total_rows = 0
+    reports = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for path in paths:
+            future = executor.submit(convert_file, path, targets[path], file_format, options, read_options, workers,
+                                     profile=bool(args.profile))
+            futures[future] = path
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                rows, elapsed, report = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"FAILED {path}: {e}", file=sys.stderr)
+                continue
+            total_rows += rows
+            if report:
+                reports[path] = report
+            print(f"{path}: {rows} rows in {elapsed:.2f} s ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths) - failures}/{len(paths)} files, {total_rows} rows in {elapsed:.2f} s "
+          f"({total_rows / elapsed if elapsed else 0:,.0f} rows/s)")
+    if args.profile:
+        with open(args.profile, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import cycle, islice
+
+import pandas as pd
+
+from Converter import Converter
+from profiling import Profiler
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, peak memory is then not reported
+    resource = None
+
+WORDS = ["zażółć", "gęślą", "jaźń", "łódź", "wartość", "źródło", "pięść", "Kraków", "żółw", "ćma"]
+
+# name: (format, convert_into_* arguments)
+CASES = {
+    "pdf": ("pdf", {"single_line": True}),
+    "pdf-multiline": ("pdf", {"single_line": False}),
+    "pdf-compact": ("pdf", {"single_line": True, "compact": True}),
+    "pdf-table": ("pdf", {"table": True, "interval": 6}),
+    "docx": ("docx", {"single_line": True}),
+    "docx-multiline": ("docx", {"single_line": False}),
+    "docx-fast": ("docx", {"single_line": True, "engine": "fast"}),
+    "docx-table": ("docx", {"table": True}),
+}
+
+
+def make_text(j, text_length):
+    words = islice(cycle(WORDS), j % len(WORDS), None)
+    text = ""
+    while len(text) < text_length:
+        text += next(words) + " "
+    return f"{text[:text_length].rstrip()} {j}"
+
+
+def make_workbook(path, rows, columns, text_length=20):
+    data = {}
+    for i in range(columns):
+        if i % 2:
+            data[f"Kolumna {i}"] = range(rows)
+        else:
+            data[f"Kolumna {i}"] = [make_text(j, text_length) for j in range(rows)]
+    pd.DataFrame(data).to_excel(path, index=False)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(source, output_dir, name, streaming):
+    # Runs in a fresh process, so parsing is not served from the workbook cache and the peak RSS is the case's own
+    file_format, options = CASES[name]
+    converter = Converter(source, streaming=streaming)
+    start = time.perf_counter()
+    if not streaming:
+        converter.open_file()
+    parse = time.perf_counter() - start
+
+    file_name = os.path.join(output_dir, f"{name}.{file_format}")
+    # Stage times of the conversion, so a slower save can be told apart from a slower row loop
+    converter.profiler = Profiler(trace_memory=False)
+    start = time.perf_counter()
+    if file_format == "pdf":
+        converter.convert_into_pdf(file_name=file_name, **options)
+    else:
+        converter.convert_into_word(file_name=file_name, **options)
+    convert = time.perf_counter() - start
+    stages = converter.profiler.report()["stages"]
+
+    def seconds(stage):
+        return stages[stage]["seconds"] if stage in stages else 0.0
+
+    return {
+        "rows": converter.rows_read,
+        # Streamed rows are parsed during the conversion, in its read stage
+        "parse_s": round(parse + seconds("read"), 3),
+        "format_s": round(seconds("format"), 3),
+        "render_s": round(seconds("render"), 3),
+        "save_s": round(seconds("write"), 3),
+        "convert_s": round(convert, 3),
+        "rows_per_s": round(converter.rows_read / (parse + convert), 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "size_kb": round(os.path.getsize(file_name) / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    # Returns the names of cases that got slower than the baseline by more than threshold percent
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["rows_per_s"]
+        change = (result["rows_per_s"] - before) / before * 100
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<16} {before:>10,.0f} -> {result['rows_per_s']:>10,.0f} rows/s ({change:+.1f}%){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure xlsx_converter parse and conversion throughput")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--text-length", type=int, default=20, help="length of the text cells in characters")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=["pdf", "pdf-multiline", "docx-fast"])
+    parser.add_argument("--streaming", action="store_true", help="read rows with openpyxl instead of pandas")
+    parser.add_argument("--save", metavar="JSON", help="write the results to a baseline file")
+    parser.add_argument("--baseline", metavar="JSON", help="compare the results against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=10,
+                        help="slowdown in percent reported as a regression (default: 10)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "benchmark.xlsx")
+        make_workbook(source, args.rows, args.columns, args.text_length)
+        for name in args.cases:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(run_case, source, tmp, name, args.streaming).result()
+            results[name] = result
+            rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+            print(f"{name:<16} parse {result['parse_s']:>7.2f} s  format {result['format_s']:>7.2f} s  "
+                  f"render {result['render_s']:>7.2f} s  save {result['save_s']:>7.2f} s  "
+                  f"{result['rows_per_s']:>10,.0f} rows/s  peak RSS {rss}  {result['size_kb']:,.0f} KB")
+
+    if args.save:
+        report = {"rows": args.rows, "columns": args.columns, "text_length": args.text_length,
+                  "streaming": args.streaming, "cases": results}
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if (baseline["rows"], baseline["columns"]) != (args.rows, args.columns):
+            print("Warning: the baseline was measured on a workbook of a different size", file=sys.stderr)
+        if compare(results, baseline["cases"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
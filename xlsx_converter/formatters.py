@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+# Text of a whole column of values at once, picked by the column's dtype. Missing values become empty
+# cells, whole floats lose their ".0" (Excel integer columns with gaps are read as floats), long float
+# tails are rounded, dates drop a midnight time and booleans are written out.
+
+TRUE_TEXT = "Tak"
+FALSE_TEXT = "Nie"
+
+
+def format_series(series, float_precision=6):
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return _format_bool(series)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return _format_datetime(series)
+    if pd.api.types.is_float_dtype(dtype):
+        return _format_float(series, float_precision)
+    return _format_default(series)
+
+
+def _format_bool(series):
+    missing = series.isna().to_numpy()
+    text = np.where(series.fillna(False).to_numpy(dtype=bool), TRUE_TEXT, FALSE_TEXT).astype(object)
+    text[missing] = ""
+    return text.tolist()
+
+
+def _format_datetime(series):
+    present = series.dropna()
+    # Dates without a time of day are shown without "00:00:00"
+    if (present == present.dt.normalize()).all():
+        text = series.dt.strftime("%Y-%m-%d")
+    else:
+        text = series.dt.strftime("%Y-%m-%d %H:%M:%S")
+    return text.fillna("").tolist()
+
+
+def _format_float(series, float_precision):
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(values)
+    rounded = np.round(values, float_precision)
+    # Shortest representation of the rounded value, e.g. 0.1 + 0.2 gives "0.3"
+    text = rounded.astype(str).astype(object)
+    with np.errstate(invalid='ignore'):
+        whole = (rounded == np.trunc(rounded)) & (np.abs(rounded) < 2 ** 53)
+    text[whole] = rounded[whole].astype(np.int64).astype(str)
+    text[missing] = ""
+    return text.tolist()
+
+
+def _format_default(series):
+    missing = series.isna().to_numpy()
+    text = series.astype(str).to_numpy(dtype=object)
+    text[missing] = ""
+    return text.tolist()
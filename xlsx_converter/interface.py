@@ -1,21 +1,42 @@
 import json
+import os
+import shutil
 import sys
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox, QCheckBox, QLineEdit, QListWidget, QFileDialog, QMessageBox
-from PyQt5.QtCore import Qt
+import tempfile
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QCheckBox, QLineEdit, QListWidget, QFileDialog, QMessageBox, QProgressBar
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QIntValidator
+from pdf2image.exceptions import PDFInfoNotInstalledError
 from Converter import Converter
+from ConversionThread import ConversionThread
+from pdfViewer import PdfViewer
+from readers import file_filter
 
 class Interface(QWidget):
     def __init__(self):
         super().__init__()
         self.file_path = ""
+        self.last_pdf = ""
+        self.viewer = None
+        # Live preview of the first rows, rendered into numbered files so the viewer never shows a stale page
+        self.preview_rows = 5
+        self.preview_dir = tempfile.mkdtemp(prefix="xlsx_converter_")
+        self.preview_count = 0
+        self.preview_available = True  # False when pages can not be rasterized (no poppler)
         self.converter = Converter()
         self.settings_file = "settings.json"
+        self.conversion_thread = ConversionThread()
+        self.conversion_thread.progress.connect(self.update_progress)
+        self.conversion_thread.status.connect(self.update_status)
+        self.conversion_thread.converted.connect(self.conversion_finished)
+        self.conversion_thread.cancelled.connect(self.conversion_cancelled)
+        self.conversion_thread.error.connect(self.conversion_error)
         self.initUI()
         self.load_settings()
 
     def initUI(self):
         self.setWindowTitle("Excel to Word/PDF Converter")
-        self.setGeometry(100, 100, 450, 600)
+        self.setGeometry(100, 100, 1000, 600)
         layout = QVBoxLayout()
 
         # File selection
@@ -24,6 +45,23 @@ class Interface(QWidget):
         self.file_button.clicked.connect(self.choose_file)
         layout.addWidget(self.file_button)
 
+        # Sheet and row range selection
+        layout.addWidget(QLabel("Wybierz arkusze:"))
+        self.sheet_listbox = QListWidget()
+        self.sheet_listbox.setSelectionMode(QListWidget.MultiSelection)
+        self.sheet_listbox.setMaximumHeight(80)
+        self.sheet_listbox.itemSelectionChanged.connect(self.refresh_columns)
+        layout.addWidget(self.sheet_listbox)
+        layout.addWidget(QLabel("Pomiń początkowe wiersze (puste = 0)"))
+        self.skip_rows = QLineEdit()
+        # Only non-negative numbers can be typed, since both fields are read with int()
+        self.skip_rows.setValidator(QIntValidator(0, 2 ** 31 - 1, self))
+        layout.addWidget(self.skip_rows)
+        layout.addWidget(QLabel("Liczba wierszy (puste = wszystkie)"))
+        self.row_count = QLineEdit()
+        self.row_count.setValidator(QIntValidator(0, 2 ** 31 - 1, self))
+        layout.addWidget(self.row_count)
+
         # Format selection
         layout.addWidget(QLabel("Wybierz format na jaki chcesz przekonwertowac plik"))
         self.combo = QComboBox()
@@ -69,6 +107,12 @@ class Interface(QWidget):
         self.column_listbox = QListWidget()
         self.column_listbox.setSelectionMode(QListWidget.MultiSelection)
         layout.addWidget(self.column_listbox)
+        self.row_count_label = QLabel("")
+        layout.addWidget(self.row_count_label)
+
+        # Table layout option
+        self.table_chk = QCheckBox("Układ tabeli (wiele wierszy na stronie)")
+        layout.addWidget(self.table_chk)
 
         # Single line option
         layout.addWidget(QLabel("Czy tytuł kolumny i jej zawartość mają być w jednym wierszu?"))
@@ -85,11 +129,41 @@ class Interface(QWidget):
         self.page_numbering_chk = QCheckBox("Dodaj numerację stron")
         layout.addWidget(self.page_numbering_chk)
 
+        # Streaming option for very large sheets
+        self.streaming_chk = QCheckBox("Czytaj plik strumieniowo (duże pliki)")
+        layout.addWidget(self.streaming_chk)
+
+        # Parallel rendering option
+        self.parallel_chk = QCheckBox("Generuj równolegle na wszystkich rdzeniach")
+        layout.addWidget(self.parallel_chk)
+
+        # Fast DOCX engine option
+        self.fast_docx_chk = QCheckBox("Szybki zapis DOCX (bez python-docx)")
+        layout.addWidget(self.fast_docx_chk)
+
+        # Compact PDF option
+        self.compact_pdf_chk = QCheckBox("Kompaktowy PDF (mniejszy plik, zapis na bieżąco)")
+        layout.addWidget(self.compact_pdf_chk)
+
         # Save button
         self.save_button = QPushButton('Save')
         self.save_button.clicked.connect(self.save_file)
         layout.addWidget(self.save_button)
 
+        # Conversion progress; conversions run in the background and can be queued
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+        self.cancel_button = QPushButton('Anuluj')
+        self.cancel_button.clicked.connect(self.conversion_thread.cancel)
+        layout.addWidget(self.cancel_button)
+        self.preview_button = QPushButton('Podgląd PDF')
+        self.preview_button.clicked.connect(self.show_pdf)
+        self.preview_button.setEnabled(False)
+        layout.addWidget(self.preview_button)
+
         # Save settings button
         self.save_settings_button = QPushButton('Save Settings')
         self.save_settings_button.clicked.connect(self.save_settings)
@@ -100,19 +174,72 @@ class Interface(QWidget):
         self.load_settings_button.clicked.connect(self.load_settings)
         layout.addWidget(self.load_settings_button)
 
-        self.setLayout(layout)
+        # Preview pane; settings changes are collected for a moment before it is re-rendered
+        self.preview = PdfViewer(prefetch=0)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.timeout.connect(self.update_preview)
+        for signal in (self.font_size.textChanged, self.interval.textChanged, self.title.textChanged,
+                       self.description.textChanged, self.title_chk_state.stateChanged,
+                       self.title_page_chk_state.stateChanged, self.description_chk_state.stateChanged,
+                       self.column_listbox.itemSelectionChanged, self.single_line.stateChanged,
+                       self.alignment.currentTextChanged, self.page_numbering_chk.stateChanged,
+                       self.table_chk.stateChanged):
+            signal.connect(self.schedule_preview)
+
+        main_layout = QHBoxLayout()
+        main_layout.addLayout(layout)
+        main_layout.addWidget(self.preview, 1)
+        self.setLayout(main_layout)
         self.show()
 
     def choose_file(self):
         options = QFileDialog.Options()
-        self.file_path, _ = QFileDialog.getOpenFileName(self, "Select file", "", "Excel Files (*.xlsx);;All Files (*)", options=options)
+        self.file_path, _ = QFileDialog.getOpenFileName(self, "Select file", "", file_filter(), options=options)
         if self.file_path:
             self.converter.path = self.file_path
-            df = self.converter.open_file()
+            try:
+                sheet_names = self.converter.sheet_names()
+            except (ValueError, ImportError) as e:
+                QMessageBox.critical(self, "Błąd", str(e))
+                self.file_path = ""
+                return
+            self.sheet_listbox.blockSignals(True)
+            self.sheet_listbox.clear()
+            self.sheet_listbox.addItems(sheet_names)
+            self.sheet_listbox.item(0).setSelected(True)
+            self.sheet_listbox.blockSignals(False)
+            self.refresh_columns()
+
+    def apply_read_options(self):
+        self.converter.streaming = self.streaming_chk.isChecked()
+        sheets = [self.sheet_listbox.item(i).text() for i in range(self.sheet_listbox.count())
+                  if self.sheet_listbox.item(i).isSelected()]
+        self.converter.sheet_name = sheets or 0
+        self.converter.skiprows = int(self.skip_rows.text() or 0)
+        self.converter.nrows = int(self.row_count.text()) if self.row_count.text() else None
+
+    def refresh_columns(self):
+        if not self.file_path:
+            return
+        self.apply_read_options()
+        # Only the header and a few rows are read here; the sheet is parsed when it is converted
+        try:
+            columns, total_rows, dtypes = self.converter.probe()
+        except (ValueError, ImportError) as e:
+            # e.g. Parquet and Feather files need pyarrow, which is first imported here
+            QMessageBox.critical(self, "Błąd", str(e))
+            self.file_path = ""
             self.column_listbox.clear()
-            self.column_listbox.addItems(df.columns)
-            for i in range(self.column_listbox.count()):
-                self.column_listbox.item(i).setSelected(True)
+            self.row_count_label.setText("")
+            return
+        self.column_listbox.clear()
+        self.column_listbox.addItems(columns)
+        for i in range(self.column_listbox.count()):
+            self.column_listbox.item(i).setSelected(True)
+            self.column_listbox.item(i).setToolTip(dtypes[columns[i]])
+        self.row_count_label.setText(f"Około {total_rows} wierszy" if total_rows is not None else "")
+        self.schedule_preview()
 
     def toggle_title_entry(self):
         if self.title_chk_state.isChecked():
@@ -134,29 +261,124 @@ class Interface(QWidget):
         options = QFileDialog.Options()
         save_path, _ = QFileDialog.getSaveFileName(self, "Save file", "", f"{self.combo.currentText().upper()} Files (*.{self.combo.currentText()});;All Files (*)", options=options)
         if self.file_path and save_path:
-            font_size = int(self.font_size.text())
-            interval = int(self.interval.text())
-            title = self.title.text() if self.title_chk_state.isChecked() else ""
-            add_title_page = self.title_page_chk_state.isChecked()
-            description = self.description.text() if self.description_chk_state.isChecked() else ""
-            selected_columns = [item.text() for item in self.column_listbox.selectedItems()]
-            single_line = self.single_line.isChecked()
-            alignment = self.alignment.currentText()
-            page_numbering = self.page_numbering_chk.isChecked()
-            if self.combo.currentText() == "pdf":
-                self.converter.convert_into_pdf(font_size=font_size, interval=interval,
-                                                title=title, file_name=save_path,
-                                                selected_columns=selected_columns, single_line=single_line,
-                                                alignment=alignment, add_title_page=add_title_page,
-                                                description=description,
-                                                add_page_numbers=self.page_numbering_chk.isChecked())
-            else:
-                self.converter.convert_into_word(title=title, font_size=font_size,
-                                                 file_name=save_path,
-                                                 selected_columns=selected_columns, line_spacing=interval,
-                                                 single_line=single_line, alignment=alignment,
-                                                 add_title_page=add_title_page, description=description,
-                                                 add_page_numbers=self.page_numbering_chk.isChecked())
+            self.apply_read_options()
+            workers = os.cpu_count() if self.parallel_chk.isChecked() else None
+            self.conversion_thread.add_job(self.file_path, save_path, self.combo.currentText(),
+                                           self.conversion_options(self.combo.currentText()), self.read_options(),
+                                           workers)
+
+    def conversion_options(self, file_format):
+        interval = int(self.interval.text())
+        options = {
+            "font_size": int(self.font_size.text()),
+            "title": self.title.text() if self.title_chk_state.isChecked() else "",
+            "selected_columns": [item.text() for item in self.column_listbox.selectedItems()],
+            "single_line": self.single_line.isChecked(),
+            "alignment": self.alignment.currentText(),
+            "add_title_page": self.title_page_chk_state.isChecked(),
+            "description": self.description.text() if self.description_chk_state.isChecked() else "",
+            "add_page_numbers": self.page_numbering_chk.isChecked(),
+            "table": self.table_chk.isChecked(),
+        }
+        if file_format == "pdf":
+            options["interval"] = interval
+            options["compact"] = self.compact_pdf_chk.isChecked()
+        else:
+            options["line_spacing"] = interval
+            options["engine"] = "fast" if self.fast_docx_chk.isChecked() else "python-docx"
+        return options
+
+    def read_options(self):
+        return {"streaming": self.converter.streaming, "sheet_name": self.converter.sheet_name,
+                "skiprows": self.converter.skiprows, "nrows": self.converter.nrows}
+
+    def schedule_preview(self):
+        if not self.preview_available:
+            return
+        self.preview_timer.start(300)
+
+    def update_preview(self):
+        if not self.file_path or not self.font_size.text().isdigit() or not self.interval.text().isdigit():
+            return
+        self.apply_read_options()
+        read_options = self.read_options()
+        # A parsed workbook is reused; otherwise only the first rows are read, without parsing the whole sheet
+        read_options["streaming"] = self.converter.streaming or not self.converter.is_cached()
+        converter = Converter(self.file_path, **read_options)
+        converter.row_limit = self.preview_rows
+        # Word output is previewed with the PDF renderer, which uses the same options
+        self.preview_count += 1
+        file_name = os.path.join(self.preview_dir, f"podglad-{self.preview_count}.pdf")
+        try:
+            converter.convert_into_pdf(file_name=file_name, **self.conversion_options("pdf"))
+        except Exception as e:
+            self.status_label.setText(f"Podgląd: {str(e)}")
+            return
+        try:
+            self.preview.open(file_name)
+        except PDFInfoNotInstalledError:
+            self.disable_preview()
+            return
+        except Exception as e:
+            self.status_label.setText(f"Podgląd: {str(e)}")
+            return
+        try:
+            os.remove(os.path.join(self.preview_dir, f"podglad-{self.preview_count - 1}.pdf"))
+        except OSError:
+            pass
+
+    def disable_preview(self):
+        # Pages are rasterized with poppler, which the Windows build does not bundle
+        self.preview_available = False
+        self.preview_timer.stop()
+        self.preview.hide()
+        self.preview_button.setEnabled(False)
+        self.status_label.setText("Podgląd niedostępny: brak programu poppler (pdfinfo) w PATH")
+
+    def update_progress(self, value):
+        self.progress_bar.setValue(value)
+
+    def update_status(self, message):
+        self.status_label.setText(message)
+
+    def conversion_finished(self, file_name, rows, elapsed):
+        self.status_label.setText(f"Zapisano {os.path.basename(file_name)}: {rows} wierszy w {elapsed:.1f} s")
+        if file_name.lower().endswith(".pdf"):
+            self.last_pdf = file_name
+            self.preview_button.setEnabled(self.preview_available)
+
+    def show_pdf(self):
+        if self.viewer is None:
+            self.viewer = PdfViewer()
+        try:
+            self.viewer.open(self.last_pdf)
+        except PDFInfoNotInstalledError:
+            self.disable_preview()
+            return
+        except Exception as e:
+            QMessageBox.critical(self, "Błąd", str(e))
+            return
+        self.viewer.show()
+
+    def conversion_cancelled(self, file_name):
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"Anulowano {os.path.basename(file_name)}")
+
+    def conversion_error(self, message):
+        self.progress_bar.setValue(0)
+        self.status_label.setText("")
+        QMessageBox.critical(self, "Błąd", message)
+
+    def closeEvent(self, event):
+        # Qt aborts when a running QThread is destroyed, so the conversion stops at its next batch first
+        self.conversion_thread.cancel()
+        self.conversion_thread.wait()
+        self.preview.renderer.stop()
+        if self.viewer is not None:
+            self.viewer.renderer.stop()
+            self.viewer.close()
+        shutil.rmtree(self.preview_dir, ignore_errors=True)
+        super().closeEvent(event)
 
     def save_settings(self):
         settings = {
@@ -171,6 +393,11 @@ class Interface(QWidget):
             "alignment": self.alignment.currentText(),
             "format": self.combo.currentText(),
             "page_numbering": self.page_numbering_chk.isChecked(),
+            "streaming": self.streaming_chk.isChecked(),
+            "parallel": self.parallel_chk.isChecked(),
+            "fast_docx": self.fast_docx_chk.isChecked(),
+            "compact_pdf": self.compact_pdf_chk.isChecked(),
+            "table": self.table_chk.isChecked(),
         }
         with open(self.settings_file, 'w') as f:
             json.dump(settings, f)
@@ -190,6 +417,11 @@ class Interface(QWidget):
                 self.alignment.setCurrentText(settings.get("alignment", "left"))
                 self.combo.setCurrentText(settings.get("format", "docx"))
                 self.page_numbering_chk.setChecked(settings.get("page_numbering", False))
+                self.streaming_chk.setChecked(settings.get("streaming", False))
+                self.parallel_chk.setChecked(settings.get("parallel", False))
+                self.fast_docx_chk.setChecked(settings.get("fast_docx", False))
+                self.compact_pdf_chk.setChecked(settings.get("compact_pdf", False))
+                self.table_chk.setChecked(settings.get("table", False))
 
         except FileNotFoundError:
             pass
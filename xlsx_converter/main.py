@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 
 from PyQt5.QtWidgets import QApplication
@@ -6,6 +7,8 @@ from interface import Interface
 
 
 if __name__ == '__main__':
+    # Needed by the parallel converters in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     ex = Interface()
     sys.exit(app.exec_())
\ No newline at end of file
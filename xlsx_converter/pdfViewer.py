@@ -1,16 +1,234 @@
-from pdf2image import convert_from_path
-import tkinter as tk
-from PIL import ImageTk
+import mmap
+import sys
+import tempfile
+import threading
+from collections import OrderedDict, deque
 
-# Convert PDF to list of images
-images = convert_from_path('C:/Users/thg/Desktop/Maksymilian-Paluśkiewicz_CV.pdf')
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication, QHBoxLayout, QLabel, QPushButton, QScrollArea, QVBoxLayout, QWidget
 
-# Initialize Tkinter
-root = tk.Tk()
-image = ImageTk.PhotoImage(images[0])
 
-# Create a label to display the image
-label = tk.Label(root, image=image)
-label.pack()
+# Rendered pages as raw RGB bytes, keyed by (path, page, width), with LRU eviction. Evicted pages can be kept
+# in a memory-mapped temporary file, so going back to them does not start poppler again.
+class PageCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, spill_bytes=0):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        # The spill file is used as a ring: when it is full it starts over from the beginning
+        self.spill_bytes = spill_bytes
+        self.spill = None
+        self.spilled = {}
+        self.spill_end = 0
 
-root.mainloop()
\ No newline at end of file
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+            if key not in self.spilled:
+                return None
+            offset, width, height, length = self.spilled[key]
+            entry = (width, height, bytes(self.spill[offset:offset + length]))
+        self.put(key, *entry)
+        return entry
+
+    def put(self, key, width, height, data):
+        with self.lock:
+            if key in self.entries or len(data) > self.max_bytes:
+                return
+            while self.entries and self.size + len(data) > self.max_bytes:
+                old_key, old_entry = self.entries.popitem(last=False)
+                self.size -= len(old_entry[2])
+                self._spill(old_key, old_entry)
+            self.entries[key] = (width, height, data)
+            self.size += len(data)
+
+    def _spill(self, key, entry):
+        width, height, data = entry
+        if len(data) > self.spill_bytes or key in self.spilled:
+            return
+        if self.spill is None:
+            self.spill_file = tempfile.TemporaryFile()
+            self.spill_file.truncate(self.spill_bytes)
+            self.spill = mmap.mmap(self.spill_file.fileno(), self.spill_bytes)
+        if self.spill_end + len(data) > self.spill_bytes:
+            self.spilled.clear()
+            self.spill_end = 0
+        self.spill[self.spill_end:self.spill_end + len(data)] = data
+        self.spilled[key] = (self.spill_end, width, height, len(data))
+        self.spill_end += len(data)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            self.spilled.clear()
+            self.spill_end = 0
+
+
+class RenderThread(QThread):
+    # Rasterizes requested pages one at a time with poppler; a new request replaces the pending ones
+    rendered = pyqtSignal(str, int, int)  # path, page, width
+    error = pyqtSignal(str)
+
+    def __init__(self, cache):
+        super().__init__()
+        self.cache = cache
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.running = True
+
+    def request(self, path, pages, width):
+        with self.condition:
+            self.pending = deque((path, page, width) for page in pages)
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                key = self.pending.popleft()
+            if self.cache.get(key) is not None:
+                continue
+            path, page, width = key
+            try:
+                # Only this page, scaled to the width of the view
+                image = convert_from_path(path, first_page=page, last_page=page, size=(width, None))[0]
+            except Exception as e:
+                self.error.emit(f"Błąd: {str(e)}")
+                continue
+            image = image.convert('RGB')
+            self.cache.put(key, image.width, image.height, image.tobytes())
+            self.rendered.emit(path, page, width)
+
+
+class PdfViewer(QWidget):
+    def __init__(self, path=None, prefetch=2, cache_bytes=64 * 1024 * 1024, spill_bytes=0):
+        super().__init__()
+        self.path = None
+        self.page = 1
+        self.page_count = 0
+        self.prefetch = prefetch  # Pages rendered ahead and behind the current one
+        self.cache = PageCache(cache_bytes, spill_bytes)
+        self.renderer = RenderThread(self.cache)
+        self.renderer.rendered.connect(self.page_rendered)
+        self.renderer.error.connect(self.show_error)
+        self.renderer.start()
+        # Resizing re-renders at the new width, once the user stops dragging
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.timeout.connect(lambda: self.show_page(self.page))
+        self.initUI()
+        if path:
+            self.open(path)
+
+    def initUI(self):
+        self.setWindowTitle("Podgląd PDF")
+        self.setGeometry(150, 150, 600, 800)
+        layout = QVBoxLayout()
+
+        navigation = QHBoxLayout()
+        self.prev_button = QPushButton('Poprzednia')
+        self.prev_button.clicked.connect(lambda: self.show_page(self.page - 1))
+        navigation.addWidget(self.prev_button)
+        self.page_label = QLabel("")
+        self.page_label.setAlignment(Qt.AlignCenter)
+        navigation.addWidget(self.page_label)
+        self.next_button = QPushButton('Następna')
+        self.next_button.clicked.connect(lambda: self.show_page(self.page + 1))
+        navigation.addWidget(self.next_button)
+        layout.addLayout(navigation)
+
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.scroll = QScrollArea()
+        self.scroll.setWidget(self.image_label)
+        self.scroll.setWidgetResizable(True)
+        layout.addWidget(self.scroll)
+
+        self.setLayout(layout)
+
+    def open(self, path):
+        # Closing the window stops the renderer, so a viewer that is opened again starts it anew
+        if not self.renderer.isRunning():
+            self.renderer.running = True
+            self.renderer.start()
+        # The same path may hold a new document, so pages of the previous one are dropped
+        self.cache.clear()
+        self.path = path
+        self.page_count = pdfinfo_from_path(path)["Pages"]
+        self.show_page(1)
+
+    def page_width(self):
+        return max(100, self.scroll.viewport().width())
+
+    def show_page(self, page):
+        if not self.path:
+            return
+        self.page = min(max(1, page), self.page_count)
+        self.page_label.setText(f"Strona {self.page}/{self.page_count}")
+        self.prev_button.setEnabled(self.page > 1)
+        self.next_button.setEnabled(self.page < self.page_count)
+        width = self.page_width()
+        entry = self.cache.get((self.path, self.page, width))
+        if entry is not None:
+            self.display(entry)
+        elif self.image_label.pixmap() is None:
+            # Otherwise the previous page stays until the new one is ready, which avoids flicker in previews
+            self.image_label.setText("Renderowanie...")
+        # The current page first, then its neighbours, nearest first
+        pages = [self.page]
+        for distance in range(1, self.prefetch + 1):
+            pages += [page for page in (self.page + distance, self.page - distance) if 1 <= page <= self.page_count]
+        self.renderer.request(self.path, pages, width)
+
+    def page_rendered(self, path, page, width):
+        if (path, page, width) == (self.path, self.page, self.page_width()):
+            self.display(self.cache.get((path, page, width)))
+
+    def display(self, entry):
+        width, height, data = entry
+        # QImage does not copy the buffer, so the copy keeps the pixels alive after data is gone
+        image = QImage(data, width, height, 3 * width, QImage.Format_RGB888).copy()
+        self.image_label.setPixmap(QPixmap.fromImage(image))
+
+    def show_error(self, message):
+        self.image_label.setText(message)
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_PageDown, Qt.Key_Right):
+            self.show_page(self.page + 1)
+        elif event.key() in (Qt.Key_PageUp, Qt.Key_Left):
+            self.show_page(self.page - 1)
+        else:
+            super().keyPressEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.path:
+            self.resize_timer.start(150)
+
+    def closeEvent(self, event):
+        self.renderer.stop()
+        super().closeEvent(event)
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    viewer = PdfViewer(sys.argv[1] if len(sys.argv) > 1 else None)
+    viewer.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,74 @@
+import json
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+# Wall time, rows and peak traced memory of each conversion stage (read, format, render, write). A stage
+# entered inside another one is not counted in the outer stage, so the times add up to the conversion time.
+# Memory is traced with tracemalloc in this process only; parallel render workers are not included.
+class Profiler:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = OrderedDict()
+        self.stack = []  # [name, time the stage was entered or last resumed]
+        self.started_tracing = False
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        now = time.perf_counter()
+        if self.stack:
+            self._pause(now)
+        self.stack.append([name, now])
+        try:
+            yield self
+        finally:
+            now = time.perf_counter()
+            self._pause(now)
+            self.stages[name]["calls"] += 1
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1][1] = now
+
+    def _pause(self, now):
+        # Adds the time and memory peak since the innermost stage was entered or resumed
+        name, start = self.stack[-1]
+        stats = self._stats(name)
+        stats["seconds"] += now - start
+        if tracemalloc.is_tracing():
+            stats["peak_bytes"] = max(stats["peak_bytes"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+    def _stats(self, name):
+        if name not in self.stages:
+            self.stages[name] = {"calls": 0, "seconds": 0.0, "rows": 0, "peak_bytes": 0}
+        return self.stages[name]
+
+    def add_rows(self, name, rows):
+        self._stats(name)["rows"] += rows
+
+    def stop(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def report(self):
+        self.stop()
+        stages = OrderedDict()
+        for name, stats in self.stages.items():
+            rows, seconds = stats["rows"], stats["seconds"]
+            stages[name] = {
+                "calls": stats["calls"],
+                "seconds": round(seconds, 4),
+                "rows": rows,
+                "rows_per_s": round(rows / seconds, 1) if rows and seconds else None,
+                "peak_mb": round(stats["peak_bytes"] / (1024 * 1024), 2) if self.trace_memory else None,
+            }
+        return {"seconds": round(sum(stats["seconds"] for stats in self.stages.values()), 4), "stages": stages}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.report(), indent=indent)
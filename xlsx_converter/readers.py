@@ -0,0 +1,323 @@
+import os
+from itertools import islice
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Readers of the supported table files, chosen by file extension. Each one can parse the selected rows and
+# columns into a DataFrame, or stream them as DataFrames of batch_size rows without loading the whole table.
+# sheet_name, skiprows and nrows mean the same as in pd.read_excel; files with a single table ignore sheet_name.
+
+READERS = {}
+
+
+def register_reader(reader_class):
+    for extension in reader_class.extensions:
+        READERS[extension] = reader_class
+    return reader_class
+
+
+def open_reader(path, **options):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Nieobsługiwany typ pliku: {extension or path}")
+    return READERS[extension](path, **options)
+
+
+def file_filter():
+    # Filter string for QFileDialog: all supported files first, then one entry per reader
+    patterns = {}
+    for extension, reader_class in READERS.items():
+        patterns.setdefault(reader_class.description, []).append(f"*{extension}")
+    everything = " ".join(pattern for group in patterns.values() for pattern in group)
+    return ";;".join([f"Tabele ({everything})"] +
+                     [f"{description} ({' '.join(group)})" for description, group in patterns.items()] +
+                     ["All Files (*)"])
+
+
+def _pyarrow():
+    # pyarrow is only needed for Parquet and Arrow files, so it is imported when one is opened
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Pliki Parquet i Feather/Arrow wymagają pakietu pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+class Reader:
+    extensions = ()
+    description = ""
+
+    def __init__(self, path, sheet_name=0, skiprows=0, nrows=None):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.skiprows = skiprows
+        self.nrows = nrows
+        self.columns = []  # Every column of the selected sheets, set by header() and stream()
+        self.total_rows = None  # Rows stream() will yield; an estimate for some formats, None if unknown
+
+    def sheet_names(self):
+        # A single table, named after the file
+        return [os.path.splitext(os.path.basename(self.path))[0]]
+
+    def header(self):
+        raise NotImplementedError
+
+    def read(self, usecols=None):
+        raise NotImplementedError
+
+    def stream(self, columns=None, batch_size=1000):
+        # Returns the streamed column names and a generator of DataFrames with those columns
+        raise NotImplementedError
+
+    def _window(self, rows):
+        # Number of rows left after skiprows and nrows
+        if rows is None:
+            return None
+        rows = max(0, rows - self.skiprows)
+        return rows if self.nrows is None else min(rows, self.nrows)
+
+    def _projection(self, usecols):
+        # Requested columns present in the file, in the requested order
+        return [col for col in usecols if col in self.columns] if usecols else None
+
+
+@register_reader
+class ExcelReader(Reader):
+    extensions = (".xlsx", ".xlsm")
+    description = "Excel Files"
+
+    def sheet_names(self):
+        workbook = load_workbook(self.path, read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+
+    def _selected_sheets(self, workbook):
+        selection = self.sheet_name
+        if selection is None:
+            return workbook.worksheets
+        if not isinstance(selection, (list, tuple)):
+            selection = [selection]
+        return [workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet] for sheet in selection]
+
+    @staticmethod
+    def _sheet_header(sheet):
+        header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        # Same names pandas gives to missing headers
+        return [f"Unnamed: {i}" if col is None else col for i, col in enumerate(header)]
+
+    def header(self):
+        # Column names of the selected sheets, read without touching the data rows
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            headers = [self._sheet_header(sheet) for sheet in self._selected_sheets(workbook)]
+        finally:
+            workbook.close()
+        self.columns = list(dict.fromkeys(col for header in headers for col in header))
+        return self.columns
+
+    def read(self, usecols=None):
+        # Unused sheets, rows and columns are skipped by the reader instead of being dropped afterwards
+        frames = pd.read_excel(self.path, sheet_name=self.sheet_name,
+                               usecols=(lambda col: col in usecols) if usecols else None,
+                               skiprows=range(1, self.skiprows + 1) if self.skiprows else None,
+                               nrows=self.nrows)
+        if isinstance(frames, dict):
+            # An empty sheet would turn every column into object dtype, so it is left out unless all are empty
+            non_empty = [frame for frame in frames.values() if not frame.empty]
+            frames = pd.concat(non_empty or list(frames.values()), ignore_index=True) if frames else pd.DataFrame()
+        if usecols:
+            frames = frames[[col for col in usecols if col in frames.columns]]
+        return frames
+
+    def stream(self, columns=None, batch_size=1000):
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        sheets = [(self._sheet_header(sheet), sheet) for sheet in self._selected_sheets(workbook)]
+        self.columns = list(dict.fromkeys(col for header, _ in sheets for col in header))
+        columns = self._projection(columns) or self.columns
+        min_row = 2 + self.skiprows
+        max_row = min_row + self.nrows - 1 if self.nrows is not None else None
+        self.total_rows = self._estimate_rows([sheet for _, sheet in sheets], min_row, max_row)
+
+        def rows():
+            for header, sheet in sheets:
+                positions = [header.index(col) if col in header else None for col in columns]
+                present = [position for position in positions if position is not None]
+                if not present or max_row is not None and max_row < min_row:
+                    continue
+                # Only the span of selected columns is read from the sheet
+                first_col = min(present)
+                offsets = [None if position is None else position - first_col for position in positions]
+                blank_rows = 0
+                for row in sheet.iter_rows(min_row=min_row, max_row=max_row, min_col=first_col + 1,
+                                           max_col=max(present) + 1, values_only=True):
+                    if all(value is None for value in row):
+                        # Trailing blank rows are dropped, so emit them only once data follows
+                        blank_rows += 1
+                        continue
+                    for _ in range(blank_rows):
+                        yield (float("nan"),) * len(columns)
+                    blank_rows = 0
+                    # Empty cells and columns missing from this sheet become NaN, as with pd.read_excel
+                    yield tuple(row[i] if i is not None and i < len(row) and row[i] is not None
+                                else float("nan") for i in offsets)
+
+        def generate():
+            try:
+                values = rows()
+                for chunk in iter(lambda: list(islice(values, batch_size)), []):
+                    # Dtypes are inferred per chunk, since openpyxl only gives Python values
+                    yield pd.DataFrame(chunk, columns=columns).infer_objects()
+            finally:
+                workbook.close()
+
+        return columns, generate()
+
+    @staticmethod
+    def _estimate_rows(sheets, min_row, max_row):
+        # Sheet dimensions come from the file's metadata, so trailing blank rows may be counted
+        total = 0
+        for sheet in sheets:
+            if sheet.max_row is None:
+                return None
+            last_row = sheet.max_row if max_row is None else min(sheet.max_row, max_row)
+            total += max(0, last_row - min_row + 1)
+        return total
+
+
+@register_reader
+class CsvReader(Reader):
+    extensions = (".csv", ".tsv")
+    description = "CSV"
+
+    def _options(self):
+        return {"sep": "\t" if self.path.lower().endswith(".tsv") else ",", "encoding": "utf-8-sig"}
+
+    def _read_csv(self, usecols=None, **options):
+        return pd.read_csv(self.path, usecols=(lambda col: col in usecols) if usecols else None,
+                           skiprows=range(1, self.skiprows + 1) if self.skiprows else None,
+                           nrows=self.nrows, **self._options(), **options)
+
+    def header(self):
+        self.columns = pd.read_csv(self.path, nrows=0, **self._options()).columns.to_list()
+        return self.columns
+
+    def read(self, usecols=None):
+        df = self._read_csv(usecols)
+        return df[[col for col in usecols if col in df.columns]] if usecols else df
+
+    def stream(self, columns=None, batch_size=1000):
+        self.header()
+        self.total_rows = self._window(self._estimate_rows())
+        columns = self._projection(columns) or self.columns
+        chunks = self._read_csv(columns, chunksize=batch_size)
+
+        def generate():
+            # pandas parses one chunk at a time; dtypes are inferred per chunk
+            with chunks:
+                for chunk in chunks:
+                    yield chunk[columns]
+
+        return columns, generate()
+
+    def _estimate_rows(self, sample_bytes=64 * 1024):
+        # Extrapolated from the line length at the start of the file; exact for small files
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            sample = f.read(sample_bytes)
+        lines = sample.count(b'\n') + (not sample.endswith(b'\n') and len(sample) == size)
+        if not lines:
+            return None
+        if len(sample) == size:
+            return max(0, lines - 1)
+        return max(0, round(size * lines / len(sample)) - 1)
+
+
+class ArrowTableReader(Reader):
+    # Shared by the pyarrow based readers, which yield record batches of the selected columns
+
+    def header(self):
+        self.columns = list(self._schema().names)
+        return self.columns
+
+    def _window_batches(self, batches, skip):
+        # Applies skiprows and nrows to a sequence of record batches, converting only the rows that are kept
+        left = self.nrows
+        for batch in batches:
+            if left == 0:
+                return
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            batch = batch.slice(skip, left)
+            skip = 0
+            if left is not None:
+                left -= batch.num_rows
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+
+@register_reader
+class ParquetReader(ArrowTableReader):
+    extensions = (".parquet", ".pq")
+    description = "Parquet"
+
+    def _schema(self):
+        return _pyarrow().parquet.read_schema(self.path)
+
+    def read(self, usecols=None):
+        self.header()
+        # Only the selected columns are decoded
+        table = _pyarrow().parquet.read_table(self.path, columns=self._projection(usecols))
+        return table.slice(self.skiprows, self.nrows).to_pandas()
+
+    def stream(self, columns=None, batch_size=1000):
+        parquet_file = _pyarrow().parquet.ParquetFile(self.path)
+        self.columns = list(parquet_file.schema_arrow.names)
+        self.total_rows = self._window(parquet_file.metadata.num_rows)
+        columns = self._projection(columns) or self.columns
+        # Row groups before the first wanted row are not read at all
+        row_groups, skip = [], self.skiprows
+        for i in range(parquet_file.num_row_groups):
+            rows = parquet_file.metadata.row_group(i).num_rows
+            if not row_groups and skip >= rows:
+                skip -= rows
+                continue
+            row_groups.append(i)
+        batches = parquet_file.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=columns)
+        return columns, self._window_batches(batches, skip)
+
+
+@register_reader
+class FeatherReader(ArrowTableReader):
+    extensions = (".feather", ".arrow", ".ipc")
+    description = "Feather/Arrow"
+
+    def _open(self):
+        # Memory-mapped, so record batches reference the file instead of being copied into memory
+        pa = _pyarrow()
+        return pa.ipc.open_file(pa.memory_map(self.path, 'r'))
+
+    def _schema(self):
+        return self._open().schema
+
+    def read(self, usecols=None):
+        self.header()
+        table = _pyarrow().feather.read_table(self.path, columns=self._projection(usecols), memory_map=True)
+        return table.slice(self.skiprows, self.nrows).to_pandas()
+
+    def stream(self, columns=None, batch_size=1000):
+        file_reader = self._open()
+        self.columns = list(file_reader.schema.names)
+        columns = self._projection(columns) or self.columns
+        batches = [file_reader.get_batch(i).select(columns) for i in range(file_reader.num_record_batches)]
+        self.total_rows = self._window(sum(batch.num_rows for batch in batches))
+        # Record batches are split further so progress and memory follow batch_size
+        chunks = (batch.slice(start, batch_size)
+                  for batch in batches for start in range(0, batch.num_rows, batch_size))
+        return columns, self._window_batches(chunks, self.skiprows)